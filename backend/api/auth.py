@@ -1,19 +1,30 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select, event
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
-from database import get_db
+from database import get_db, get_async_db
 from models.user import User
+from services.auth_cache import auth_cache, UserSnapshot
+from services.password_hasher import password_hasher
+from services.executors import PoolBusy
+from services.rate_limiter import RateLimiter
 from config import settings
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = password_hasher.pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Login attempts are throttled per client address and per account
+login_rate_limiter = RateLimiter(
+    max_attempts=settings.LOGIN_RATE_LIMIT_ATTEMPTS,
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+)
+
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 # Pydantic models
@@ -40,6 +51,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
 
 # Utility functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -51,10 +63,14 @@ def get_password_hash(password: str) -> str:
 def get_user(db: Session, username: str) -> Optional[User]:
     return db.query(User).filter(User.username == username).first()
 
+async def get_user_async(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
-def authenticate_user(db: Session, username_or_email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: Session, username_or_email: str, password: str) -> Optional[User]:
     # Try to find user by username first
     user = get_user(db, username_or_email)
     
@@ -64,10 +80,17 @@ def authenticate_user(db: Session, username_or_email: str, password: str) -> Opt
     
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
     return user
 
+def hashing_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -78,30 +101,53 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserSnapshot:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    
+    # Recently verified tokens skip both the JWT decode and the user lookup
+    cached_user = auth_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=payload.get("uid"))
     except JWTError:
         raise credentials_exception
-    user = get_user(db, username=token_data.username)
+    
+    # Tokens carry the user id so the lookup goes by primary key; older
+    # tokens without it fall back to the username
+    if token_data.user_id is not None:
+        user = await db.get(User, token_data.user_id)
+    else:
+        user = await get_user_async(db, username=token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    
+    snapshot = UserSnapshot.from_user(user)
+    auth_cache.put(token, snapshot, token_expires_at=payload.get("exp"))
+    return snapshot
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+# Drop cached snapshots whenever a user row changes (e.g. deactivation) or is
+# deleted. Bulk query(User).update()/delete() and changes made by other worker
+# processes skip these events; AUTH_CACHE_TTL_SECONDS bounds how long those stay stale.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    auth_cache.invalidate_user(target.id)
+
 # API Endpoints
 @router.post("/register", response_model=UserResponse)
 async def register_user(user: UserCreate, db: Session = Depends(get_db)):
@@ -122,7 +168,10 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except PoolBusy:
+        raise hashing_busy_exception()
     db_user = User(
         username=user.username,
         email=user.email,
@@ -136,17 +185,33 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # Reject bursts before they reach the database or bcrypt
+    client_host = request.client.host if request.client else "unknown"
+    account_key = f"user:{form_data.username.lower()}"
+    for key in (f"ip:{client_host}", account_key):
+        retry_after = login_rate_limiter.hit(key)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+    
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except PoolBusy:
+        raise hashing_busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username/email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_rate_limiter.reset(account_key)
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
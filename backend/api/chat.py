@@ -1,15 +1,19 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from database import get_db
+from database import get_db, get_async_db, unit_of_work, async_unit_of_work
+from pagination import NEXT_CURSOR_HEADER
 from models.user import User
 from models.replica import Conversation, Message
 from api.auth import get_current_active_user
 from services.ai_service import ai_service
 from services.advanced_ai_service import advanced_ai_service
 from services.free_ai_service import free_ai_service
+from services.executors import run_io
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -25,7 +29,7 @@ class ReplicaChat(BaseModel):
 
 class ChatResponse(BaseModel):
     response: str
-    conversation_id: int
+    conversation_id: Optional[int] = None
     tokens_used: Optional[int] = None
     replica_name: Optional[str] = None
     error: Optional[str] = None
@@ -67,7 +71,8 @@ async def chat_with_self(
     """Chat with your past self using your memories."""
     
     try:
-        result = ai_service.chat_with_self(
+        result = await run_io(
+            ai_service.chat_with_self,
             user_message=chat.message,
             user_id=current_user.id,
             db=db,
@@ -77,7 +82,7 @@ async def chat_with_self(
         if "error" in result:
             return ChatResponse(
                 response="",
-                conversation_id=result.get("conversation_id", 0),
+                conversation_id=result.get("conversation_id"),
                 error=result["error"]
             )
         
@@ -99,7 +104,8 @@ async def chat_with_replica(
     """Chat with an AI replica of a loved one."""
     
     try:
-        result = ai_service.chat_with_replica(
+        result = await run_io(
+            ai_service.chat_with_replica,
             user_message=chat.message,
             replica_id=chat.replica_id,
             user_id=current_user.id,
@@ -110,7 +116,7 @@ async def chat_with_replica(
         if "error" in result:
             return ChatResponse(
                 response="",
-                conversation_id=result.get("conversation_id", 0),
+                conversation_id=result.get("conversation_id"),
                 error=result["error"]
             )
         
@@ -132,7 +138,7 @@ async def get_conversations(
     """Get all conversations for the current user."""
     
     try:
-        conversations = ai_service.get_user_conversations(current_user.id, db)
+        conversations = await run_io(ai_service.get_user_conversations, current_user.id, db)
         return [ConversationResponse(**conv) for conv in conversations]
     
     except Exception as e:
@@ -141,15 +147,26 @@ async def get_conversations(
 @router.get("/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
 async def get_conversation_messages(
     conversation_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 100,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get all messages for a specific conversation."""
+    """Get messages for a specific conversation, oldest first, one page at a time."""
     
     try:
-        messages = ai_service.get_conversation_history(conversation_id, current_user.id, db)
+        messages, next_cursor = await run_io(
+            ai_service.get_conversation_history,
+            conversation_id, current_user.id, db, cursor=cursor, limit=limit
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         return [MessageResponse(**msg) for msg in messages]
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving messages: {str(e)}")
 
@@ -275,9 +292,13 @@ async def chat_with_ai_service(
             for msg in reversed(messages):
                 role = "user" if msg.message_type == "user" else "assistant"
                 conversation_history.append({"role": role, "content": msg.content})
+            
+            # End the read transaction so no connection is held while the AI responds
+            db.rollback()
         
         # Get AI response
-        result = advanced_ai_service.chat_with_ai_service(
+        result = await run_io(
+            advanced_ai_service.chat_with_ai_service,
             service_id=chat.service_id,
             user_message=chat.message,
             user_context=user_context,
@@ -287,52 +308,51 @@ async def chat_with_ai_service(
         if not result.get("success"):
             return ChatResponse(
                 response="I'm sorry, but I'm having trouble responding right now. Please try again in a moment.",
-                conversation_id=chat.conversation_id or 0,
+                conversation_id=chat.conversation_id,
                 error=result.get("error")
             )
         
-        # Create or get conversation for advanced AI services
-        conversation = None
-        if chat.conversation_id:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == chat.conversation_id,
-                Conversation.user_id == current_user.id
-            ).first()
-        else:
-            # Create new conversation
-            conversation = Conversation(
-                user_id=current_user.id,
-                conversation_type="ai_service",
-                title=f"Chat with {result['service_name']} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-        
-        # Save messages
-        user_msg = Message(
-            conversation_id=conversation.id,
-            content=chat.message,
-            message_type="user"
-        )
-        db.add(user_msg)
-        
-        ai_msg = Message(
-            conversation_id=conversation.id,
-            content=result["response"],
-            message_type="ai",
-            tokens_used=result.get("tokens_used"),
-            model_used="gpt-4"
-        )
-        db.add(ai_msg)
-        
-        # Update conversation timestamp
-        conversation.last_message_at = datetime.utcnow()
-        db.commit()
+        # Create or get conversation for advanced AI services and save the
+        # turn in a single transaction, after the AI call has returned
+        with unit_of_work(db):
+            conversation = None
+            if chat.conversation_id:
+                conversation = db.query(Conversation).filter(
+                    Conversation.id == chat.conversation_id,
+                    Conversation.user_id == current_user.id
+                ).first()
+            else:
+                # Create new conversation
+                conversation = Conversation(
+                    user_id=current_user.id,
+                    conversation_type="ai_service",
+                    title=f"Chat with {result['service_name']} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+                )
+                db.add(conversation)
+            
+            # Save messages
+            db.add(Message(
+                conversation=conversation,
+                content=chat.message,
+                message_type="user"
+            ))
+            
+            db.add(Message(
+                conversation=conversation,
+                content=result["response"],
+                message_type="ai",
+                tokens_used=result.get("tokens_used"),
+                model_used="gpt-4"
+            ))
+            
+            # Update conversation timestamp
+            conversation.last_message_at = datetime.utcnow()
+            db.flush()
+            conversation_id = conversation.id
         
         return ChatResponse(
             response=result["response"],
-            conversation_id=conversation.id,
+            conversation_id=conversation_id,
             tokens_used=result.get("tokens_used"),
             replica_name=result["service_name"]
         )
@@ -435,25 +455,25 @@ async def test_free_ai_providers(
     current_user: User = Depends(get_current_active_user)
 ):
     """Test which free AI providers are working."""
-    return free_ai_service.test_providers()
+    return await run_io(free_ai_service.test_providers)
 
 @router.get("/free-ai/status")
 async def get_free_ai_status(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get detailed status of all AI providers including fallback info."""
-    return free_ai_service.get_provider_status()
+    return await run_io(free_ai_service.get_provider_status)
 
 @router.post("/free-ai/chat-smart")
 async def chat_with_smart_fallback(
     chat: FreeAIChatMessage,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Smart chat that automatically selects the best available provider."""
     
     # Auto-select best provider if none specified or if specified provider is unavailable
-    provider_status = free_ai_service.get_provider_status()
+    provider_status = await run_io(free_ai_service.get_provider_status)
     available_providers = [p for p, status in provider_status.items() if status["available"]]
     
     if not chat.provider or chat.provider not in available_providers:
@@ -467,7 +487,7 @@ async def chat_with_smart_fallback(
         else:
             return ChatResponse(
                 response="No AI providers are currently available. Please try again later.",
-                conversation_id=chat.conversation_id or 0,
+                conversation_id=chat.conversation_id,
                 error="No providers available"
             )
     
@@ -478,7 +498,7 @@ async def chat_with_smart_fallback(
 async def chat_with_free_ai(
     chat: FreeAIChatMessage,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Chat using free AI providers with automatic fallback (Gemini ↔ Groq)."""
     
@@ -493,16 +513,24 @@ async def chat_with_free_ai(
         # Get conversation history if conversation_id provided
         conversation_history = []
         if chat.conversation_id:
-            messages = db.query(Message).filter(
-                Message.conversation_id == chat.conversation_id
-            ).order_by(Message.created_at.desc()).limit(8).all()  # Increased context
+            rows = await db.execute(
+                select(Message)
+                .where(Message.conversation_id == chat.conversation_id)
+                .order_by(Message.created_at.desc())
+                .limit(8)  # Increased context
+            )
+            messages = rows.scalars().all()
             
             for msg in reversed(messages):
                 role = "user" if msg.message_type == "user" else "assistant"
                 conversation_history.append({"role": role, "content": msg.content})
+            
+            # End the read transaction so no connection is held while the providers respond
+            await db.rollback()
         
         # Use the enhanced fallback system
-        result = free_ai_service.chat_with_fallback(
+        result = await run_io(
+            free_ai_service.chat_with_fallback,
             service_id=chat.service_id,
             user_message=chat.message,
             preferred_provider=chat.provider,
@@ -513,58 +541,57 @@ async def chat_with_free_ai(
         if not result.get("success"):
             return ChatResponse(
                 response="I apologize, but all AI providers are currently unavailable. Please try again in a moment.",
-                conversation_id=chat.conversation_id or 0,
+                conversation_id=chat.conversation_id,
                 error=result.get("error")
             )
         
-        # Create or get conversation
-        conversation = None
-        if chat.conversation_id:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == chat.conversation_id,
-                Conversation.user_id == current_user.id
-            ).first()
-        else:
-            # Create new conversation with provider info
-            provider_name = result["provider"]
-            conversation = Conversation(
-                user_id=current_user.id,
-                conversation_type="free_ai",
-                title=f"AI Chat ({provider_name}) - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-        
-        # Save messages
-        user_msg = Message(
-            conversation_id=conversation.id,
-            content=chat.message,
-            message_type="user"
-        )
-        db.add(user_msg)
-        
         # Include fallback info in the AI message if applicable
         ai_content = result["response"]
         if result.get("fallback_used"):
             fallback_note = f"\n\n*Note: Switched from {result['original_provider']} to {result['fallback_provider']} to ensure uninterrupted service.*"
             ai_content += fallback_note
         
-        ai_msg = Message(
-            conversation_id=conversation.id,
-            content=ai_content,
-            message_type="ai",
-            model_used=result["provider"]
-        )
-        db.add(ai_msg)
-        
-        # Update conversation timestamp
-        conversation.last_message_at = datetime.utcnow()
-        db.commit()
+        # Create or get conversation and save the turn in a single transaction
+        async with async_unit_of_work(db):
+            conversation = None
+            if chat.conversation_id:
+                rows = await db.execute(select(Conversation).where(
+                    Conversation.id == chat.conversation_id,
+                    Conversation.user_id == current_user.id
+                ))
+                conversation = rows.scalars().first()
+            else:
+                # Create new conversation with provider info
+                provider_name = result["provider"]
+                conversation = Conversation(
+                    user_id=current_user.id,
+                    conversation_type="free_ai",
+                    title=f"AI Chat ({provider_name}) - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+                )
+                db.add(conversation)
+            
+            # Save messages
+            db.add(Message(
+                conversation=conversation,
+                content=chat.message,
+                message_type="user"
+            ))
+            
+            db.add(Message(
+                conversation=conversation,
+                content=ai_content,
+                message_type="ai",
+                model_used=result["provider"]
+            ))
+            
+            # Update conversation timestamp
+            conversation.last_message_at = datetime.utcnow()
+            await db.flush()
+            conversation_id = conversation.id
         
         return ChatResponse(
             response=result["response"],
-            conversation_id=conversation.id,
+            conversation_id=conversation_id,
             replica_name=result["provider"],
             tokens_used=result.get("conversation_length", 0)  # Return context length
         )
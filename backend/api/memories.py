@@ -1,20 +1,36 @@
+import asyncio
 import os
-import shutil
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from database import get_db
+from database import get_db, get_async_db, unit_of_work, SessionLocal
+from pagination import paginate_async, NEXT_CURSOR_HEADER
+from file_serving import file_response
 from models.memory import Memory
 from models.user import User
 from api.auth import get_current_active_user
 from services.memory_service_simple import memory_service
+from services.executors import run_io, run_model
+from services.file_storage import blob_store, remove_unreferenced_files, save_temporary_upload, FileTooLarge, StoredFile
+from services.image_derivatives import image_derivatives, IMAGE_SIZES
+from services.local_enrichment import known_people
+from services.archive_export import EXPORT_FORMATS, export_archive
+from services.memory_import import (
+    IMPORT_FORMATS, ImportFormatError, ImportInterrupted, detect_format, parse_file, import_memories, enrich_memories
+)
 from config import settings
 
 router = APIRouter(prefix="/memories", tags=["Memories"])
 
+MAX_BULK_DELETE = 1000
+MAX_BATCH_CREATE = 100
+
 # Pydantic models
 class MemoryResponse(BaseModel):
     id: int
@@ -39,33 +55,60 @@ class MemoryCreate(BaseModel):
     source: str = "manual"
     timestamp: Optional[datetime] = None
 
+class MemoryBatchCreate(BaseModel):
+    memories: List[MemoryCreate]
+
 class MemorySearch(BaseModel):
     query: str
     limit: int = 10
 
+class MemoryBulkDelete(BaseModel):
+    memory_ids: List[int]
+
+class ImportResponse(BaseModel):
+    format: str
+    imported: int
+    enrichment: str
+
 class SearchResult(BaseModel):
     content: str
     metadata: dict
     similarity_score: float
     memory_id: int
+    passages: List[str] = []
 
 # Helper functions
-def save_uploaded_file(file: UploadFile, user_id: int) -> str:
-    """Save uploaded file and return file path."""
-    # Create user-specific directory
-    user_dir = os.path.join(settings.upload_directory, f"user_{user_id}")
-    os.makedirs(user_dir, exist_ok=True)
-    
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{file.filename}"
-    file_path = os.path.join(user_dir, filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return file_path
+async def save_uploaded_file(file: UploadFile, user_id: int) -> StoredFile:
+    """Stream an uploaded file into the user's content-addressed store and return its path and hash."""
+    try:
+        return await blob_store.save_upload(file, settings.max_file_size, user_id)
+    except FileTooLarge:
+        raise HTTPException(status_code=400, detail="File too large")
+
+async def render_image_derivatives(stored: StoredFile):
+    """Generate thumbnails for an uploaded image; without them the original is served."""
+    try:
+        await image_derivatives.ensure(stored.user_id, stored.sha256, stored.temp_path)
+    except Exception as e:
+        print(f"Error generating image derivatives: {e}")
+
+def apply_enrichment(memory_obj: Memory, enrichment: dict):
+    """Copy emotion and entity analysis onto a memory."""
+    memory_obj.emotions = enrichment.get("emotions")
+    memory_obj.people_mentioned = enrichment.get("people", [])
+    memory_obj.locations = enrichment.get("locations", [])
+    memory_obj.topics = enrichment.get("topics", [])
+
+def enrich_in_background(user_id: int, memory_ids: List[int]):
+    """Enrich newly stored memories in batches, after the response is sent."""
+    db = SessionLocal()
+    try:
+        enrich_memories(db, memory_service, user_id, memory_ids)
+    except Exception as e:
+        # The backfill job picks up whatever is left
+        print(f"Error enriching memories: {e}")
+    finally:
+        db.close()
 
 # API Endpoints
 @router.post("/text", response_model=MemoryResponse)
@@ -76,32 +119,69 @@ async def create_text_memory(
 ):
     """Create a text-based memory."""
     try:
-        memory_obj = memory_service.process_text_memory(
-            content=memory.content,
-            user_id=current_user.id,
-            db=db,
-            title=memory.title,
-            source=memory.source,
-            timestamp=memory.timestamp
-        )
-        
-        # Analyze emotions and entities
-        emotions = memory_service.analyze_emotions(memory.content)
-        entities = memory_service.extract_entities(memory.content)
+        # Analyze emotions and entities, recognising the user's replicas, before
+        # opening the write transaction
+        people = await run_io(known_people, db, current_user.id)
+        enrichment = await run_io(memory_service.enrich, memory.content, people)
         
-        # Update memory with analysis
-        memory_obj.emotions = emotions
-        memory_obj.people_mentioned = entities.get("people", [])
-        memory_obj.locations = entities.get("locations", [])
-        memory_obj.topics = entities.get("topics", [])
+        def store_memory() -> Memory:
+            with unit_of_work(db):
+                memory_obj = memory_service.process_text_memory(
+                    content=memory.content,
+                    user_id=current_user.id,
+                    db=db,
+                    title=memory.title,
+                    source=memory.source,
+                    timestamp=memory.timestamp
+                )
+                apply_enrichment(memory_obj, enrichment)
+            db.refresh(memory_obj)
+            return memory_obj
         
-        db.commit()
-        db.refresh(memory_obj)
-        
-        return memory_obj
+        # Embedding and database writes run on the model pool
+        return await run_model(store_memory)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating memory: {str(e)}")
 
+@router.post("/batch", response_model=List[MemoryResponse])
+async def create_text_memories(
+    batch: MemoryBatchCreate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Create many text memories at once, e.g. notes buffered by an offline client.
+
+    The batch is stored in one transaction with one embedding call; emotions
+    and entities are filled in after the response is sent.
+    """
+    
+    if not batch.memories:
+        raise HTTPException(status_code=400, detail="No memories to create")
+    if len(batch.memories) > MAX_BATCH_CREATE:
+        raise HTTPException(status_code=400, detail=f"Cannot create more than {MAX_BATCH_CREATE} memories at once")
+    if any(not memory.content.strip() for memory in batch.memories):
+        raise HTTPException(status_code=400, detail="Memory content cannot be empty")
+    
+    try:
+        def store_memories() -> List[Memory]:
+            with unit_of_work(db):
+                memory_ids = memory_service.process_text_memories(
+                    [memory.model_dump() for memory in batch.memories],
+                    user_id=current_user.id,
+                    db=db
+                )
+            stored = {memory.id: memory for memory in db.query(Memory).filter(Memory.id.in_(memory_ids))}
+            return [stored[memory_id] for memory_id in memory_ids]
+        
+        # Database writes and the batched embedding run on the model pool
+        memories = await run_model(store_memories)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating memories: {str(e)}")
+    
+    background_tasks.add_task(enrich_in_background, current_user.id, [memory.id for memory in memories])
+    return memories
+
 @router.post("/upload/voice", response_model=MemoryResponse)
 async def upload_voice_memory(
     file: UploadFile = File(...),
@@ -116,40 +196,53 @@ async def upload_voice_memory(
     if not file.content_type.startswith("audio/"):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Check file size
-    if file.size > settings.max_file_size:
+    # Reject early when the client declared a size; chunked uploads are
+    # limited while streaming
+    if file.size is not None and file.size > settings.max_file_size:
         raise HTTPException(status_code=400, detail="File too large")
     
+    # Save file
+    stored = await save_uploaded_file(file, current_user.id)
+    referenced = False
+    
     try:
-        # Save file
-        file_path = save_uploaded_file(file, current_user.id)
-        
-        # Process voice memory
-        memory_obj = memory_service.process_voice_memory(
-            file_path=file_path,
-            user_id=current_user.id,
-            db=db,
-            filename=file.filename,
-            title=title,
-            source=source
-        )
         
-        # Analyze emotions and entities
-        emotions = memory_service.analyze_emotions(memory_obj.content)
-        entities = memory_service.extract_entities(memory_obj.content)
+        # Process voice memory and its analysis, committed once
+        def store_memory() -> Memory:
+            nonlocal referenced
+            # The user's re-uploads of the same audio reuse its stored transcript
+            extracted_text = blob_store.cached_text(db, current_user.id, stored.sha256)
+            if extracted_text is None:
+                extracted_text = memory_service.transcribe_audio(stored.temp_path)
+            
+            # Analyze emotions and entities before opening the write transaction
+            people = known_people(db, current_user.id)
+            enrichment = memory_service.enrich(extracted_text or "", people)
+            
+            with unit_of_work(db):
+                blob_store.acquire(db, stored, extracted_text=extracted_text)
+                memory_obj = memory_service.process_voice_memory(
+                    file_path=stored.path,
+                    file_hash=stored.sha256,
+                    extracted_text=extracted_text,
+                    user_id=current_user.id,
+                    db=db,
+                    filename=file.filename,
+                    title=title,
+                    source=source
+                )
+                apply_enrichment(memory_obj, enrichment)
+            referenced = True
+            db.refresh(memory_obj)
+            return memory_obj
         
-        # Update memory with analysis
-        memory_obj.emotions = emotions
-        memory_obj.people_mentioned = entities.get("people", [])
-        memory_obj.locations = entities.get("locations", [])
-        memory_obj.topics = entities.get("topics", [])
-        
-        db.commit()
-        db.refresh(memory_obj)
-        
-        return memory_obj
+        # Extraction, embedding and database writes run on the model pool
+        return await run_model(store_memory)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing voice memory: {str(e)}")
+    finally:
+        # The file goes into the store only once a memory references it
+        await blob_store.finish_upload(stored, referenced)
 
 @router.post("/upload/image", response_model=MemoryResponse)
 async def upload_image_memory(
@@ -166,77 +259,198 @@ async def upload_image_memory(
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image file")
     
-    # Check file size
-    if file.size > settings.max_file_size:
+    # Reject early when the client declared a size; chunked uploads are
+    # limited while streaming
+    if file.size is not None and file.size > settings.max_file_size:
         raise HTTPException(status_code=400, detail="File too large")
     
+    # Save file
+    stored = await save_uploaded_file(file, current_user.id)
+    referenced = False
+    
     try:
-        # Save file
-        file_path = save_uploaded_file(file, current_user.id)
         
-        # Process image memory
-        memory_obj = memory_service.process_image_memory(
-            file_path=file_path,
-            user_id=current_user.id,
-            db=db,
-            filename=file.filename,
-            title=title,
-            description=description,
-            source=source
-        )
-        
-        # Analyze emotions and entities
-        emotions = memory_service.analyze_emotions(memory_obj.content)
-        entities = memory_service.extract_entities(memory_obj.content)
-        
-        # Update memory with analysis
-        memory_obj.emotions = emotions
-        memory_obj.people_mentioned = entities.get("people", [])
-        memory_obj.locations = entities.get("locations", [])
-        memory_obj.topics = entities.get("topics", [])
-        
-        db.commit()
-        db.refresh(memory_obj)
+        # Process image memory and its analysis, committed once
+        def store_memory() -> Memory:
+            nonlocal referenced
+            # The user's re-uploads of the same image reuse its stored OCR text
+            extracted_text = blob_store.cached_text(db, current_user.id, stored.sha256)
+            if extracted_text is None:
+                try:
+                    extracted_text = memory_service.extract_image_text(stored.temp_path)
+                except Exception as e:
+                    print(f"Error extracting image text: {e}")
+            
+            # Analyze emotions and entities before opening the write transaction
+            people = known_people(db, current_user.id)
+            enrichment = memory_service.enrich(
+                "\n".join(part for part in (title, extracted_text, description) if part), people
+            )
+            
+            with unit_of_work(db):
+                blob_store.acquire(db, stored, extracted_text=extracted_text)
+                memory_obj = memory_service.process_image_memory(
+                    file_path=stored.path,
+                    file_hash=stored.sha256,
+                    extracted_text=extracted_text,
+                    user_id=current_user.id,
+                    db=db,
+                    filename=file.filename,
+                    title=title,
+                    description=description,
+                    source=source
+                )
+                apply_enrichment(memory_obj, enrichment)
+            referenced = True
+            db.refresh(memory_obj)
+            return memory_obj
         
+        # Extraction, embedding and database writes run on the model pool while
+        # thumbnails and previews render on the CPU pool; both finish before
+        # cleanup, so a failed upload's derivatives can be removed
+        memory_obj, _ = await asyncio.gather(
+            run_model(store_memory),
+            render_image_derivatives(stored),
+            return_exceptions=True
+        )
+        if isinstance(memory_obj, BaseException):
+            raise memory_obj
         return memory_obj
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing image memory: {str(e)}")
+    finally:
+        # The file goes into the store only once a memory references it
+        await blob_store.finish_upload(stored, referenced)
+
+@router.post("/import", response_model=ImportResponse)
+async def import_memories_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk-import a WhatsApp chat export, an mbox mailbox or a JSON/Markdown journal."""
+    
+    # Format from the form, or guessed from the file name
+    try:
+        import_format = file_format or detect_format(file.filename or "")
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(IMPORT_FORMATS)}")
+    
+    if file.size is not None and file.size > settings.IMPORT_MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large")
+    
+    try:
+        stored = await save_temporary_upload(file, settings.IMPORT_MAX_FILE_SIZE)
+    except FileTooLarge:
+        raise HTTPException(status_code=400, detail="File too large")
+    
+    try:
+        # Parsed as a stream and stored in chunks: bulk inserts and batched embeddings
+        memory_ids = await run_model(
+            lambda: import_memories(db, memory_service, current_user.id, parse_file(stored.path, import_format))
+        )
+    except ImportInterrupted as e:
+        # Earlier chunks are stored: report them and still enrich them
+        parse_error = isinstance(e.error, (ImportFormatError, ValueError))
+        message = f"Could not parse {import_format} file" if parse_error else "Error importing memories"
+        return JSONResponse(
+            status_code=400 if parse_error else 500,
+            content={
+                "detail": f"{message} after storing {len(e.memory_ids)} memories: {str(e.error)}",
+                "imported": len(e.memory_ids),
+                "memory_ids": e.memory_ids
+            },
+            background=BackgroundTask(enrich_in_background, current_user.id, e.memory_ids)
+        )
+    except (ImportFormatError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse {import_format} file: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing memories: {str(e)}")
+    finally:
+        await run_io(os.remove, stored.path)
+    
+    # Emotions and entities are filled in after the response is sent
+    if memory_ids:
+        background_tasks.add_task(enrich_in_background, current_user.id, memory_ids)
+    
+    return ImportResponse(
+        format=import_format,
+        imported=len(memory_ids),
+        enrichment="deferred" if memory_ids else "none"
+    )
 
 @router.get("/", response_model=List[MemoryResponse])
 async def get_memories(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 20,
     content_type: Optional[str] = None,
     source: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's memories with optional filtering."""
+    """Get user's memories with optional filtering.
+
+    Results are newest first; pass the `X-Next-Cursor` response header back as
+    `cursor` to fetch the following page.
+    """
     
-    query = db.query(Memory).filter(Memory.user_id == current_user.id)
+    stmt = select(Memory).where(Memory.user_id == current_user.id)
     
     if content_type:
-        query = query.filter(Memory.content_type == content_type)
+        stmt = stmt.where(Memory.content_type == content_type)
     
     if source:
-        query = query.filter(Memory.source == source)
+        stmt = stmt.where(Memory.source == source)
     
-    memories = query.order_by(Memory.created_at.desc()).offset(skip).limit(limit).all()
+    memories, next_cursor = await paginate_async(db, stmt, Memory, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return memories
 
+@router.get("/export")
+async def export_memories(
+    format: str = "ndjson",
+    include_files: bool = False,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Download everything: memories, conversations, messages and replicas.
+
+    NDJSON has one record per line, each with a `type`; a zip holds the same
+    `archive.ndjson` plus, with `include_files`, the original uploads. The
+    archive is streamed as it is read, however large it is.
+    """
+    
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if include_files and format != "zip":
+        raise HTTPException(status_code=400, detail="Original files can only be included in a zip export")
+    
+    filename = f"echo-export-{datetime.utcnow():%Y%m%d}.{format}"
+    return StreamingResponse(
+        export_archive(current_user.id, format, include_files),
+        media_type="application/zip" if format == "zip" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{memory_id}", response_model=MemoryResponse)
 async def get_memory(
     memory_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific memory by ID."""
     
-    memory = db.query(Memory).filter(
+    result = await db.execute(select(Memory).where(
         Memory.id == memory_id,
         Memory.user_id == current_user.id
-    ).first()
+    ))
+    memory = result.scalars().first()
     
     if not memory:
         raise HTTPException(status_code=404, detail="Memory not found")
@@ -251,7 +465,8 @@ async def search_memories(
     """Search memories using semantic similarity."""
     
     try:
-        results = memory_service.search_memories(
+        results = await run_model(
+            memory_service.search_memories,
             query=search.query,
             user_id=current_user.id,
             limit=search.limit
@@ -261,13 +476,21 @@ async def search_memories(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching memories: {str(e)}")
 
-@router.get("/files/{memory_id}")
+@router.api_route("/files/{memory_id}", methods=["GET", "HEAD"])
 async def get_memory_file(
     memory_id: int,
+    request: Request,
+    size: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Download the original file for a memory."""
+    """Serve the file for a memory, with byte ranges and conditional requests.
+
+    Pass `size=thumb` or `size=preview` for a downscaled copy of an image.
+    """
+    
+    if size is not None and size not in IMAGE_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of: {', '.join(IMAGE_SIZES)}")
     
     memory = db.query(Memory).filter(
         Memory.id == memory_id,
@@ -277,18 +500,38 @@ async def get_memory_file(
     if not memory:
         raise HTTPException(status_code=404, detail="Memory not found")
     
-    if not memory.file_path or not os.path.exists(memory.file_path):
+    if not memory.file_path:
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(
-        path=memory.file_path,
-        filename=memory.original_filename or f"memory_{memory.id}",
-        media_type="application/octet-stream"
+    filename = memory.original_filename or f"memory_{memory.id}"
+    
+    # Downscaled images are rendered on first request if ingest didn't produce them;
+    # anything else falls back to the original
+    if size and memory.content_type == "image" and memory.file_hash and image_derivatives.available:
+        try:
+            paths = await image_derivatives.ensure(memory.user_id, memory.file_hash, memory.file_path, [size])
+            return file_response(
+                request,
+                paths[size],
+                filename=f"{os.path.splitext(filename)[0]}_{size}.{image_derivatives.extension}",
+                etag=f"{memory.file_hash}-{size}",
+                media_type=image_derivatives.media_type
+            )
+        except Exception as e:
+            print(f"Error serving {size} image for memory {memory.id}: {e}")
+    
+    # Stored files are content-addressed, so their hash is a strong ETag
+    return file_response(
+        request,
+        memory.file_path,
+        filename=filename,
+        etag=memory.file_hash
     )
 
 @router.delete("/{memory_id}")
 async def delete_memory(
     memory_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -303,23 +546,67 @@ async def delete_memory(
         raise HTTPException(status_code=404, detail="Memory not found")
     
     try:
-        # Delete file if exists
-        if memory.file_path and os.path.exists(memory.file_path):
-            os.remove(memory.file_path)
-        
-        # Delete from ChromaDB
+        # Delete from vector store
         if memory.embedding_id:
-            collection = memory_service.get_or_create_collection(current_user.id)
-            collection.delete(ids=[memory.embedding_id])
+            await run_io(memory_service.delete_embeddings, current_user.id, [memory.embedding_id])
         
-        # Delete from database
+        # Delete from database, dropping its reference to the stored file
+        removable = blob_store.release(db, current_user.id, [(memory.file_hash, memory.file_path)])
         db.delete(memory)
         db.commit()
         
+        # Delete the file after the response is sent, if nothing else uses it
+        if removable:
+            background_tasks.add_task(remove_unreferenced_files, removable)
+        
         return {"message": "Memory deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting memory: {str(e)}")
 
+@router.delete("/")
+async def delete_memories(
+    bulk: MemoryBulkDelete,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete many memories at once, with their vectors and files."""
+    
+    if len(bulk.memory_ids) > MAX_BULK_DELETE:
+        raise HTTPException(status_code=400, detail=f"Cannot delete more than {MAX_BULK_DELETE} memories at once")
+    
+    # Only the columns needed for cleanup, restricted to the user's own memories
+    rows = db.query(Memory.id, Memory.embedding_id, Memory.file_path, Memory.file_hash).filter(
+        Memory.id.in_(bulk.memory_ids),
+        Memory.user_id == current_user.id
+    ).all()
+    
+    if not rows:
+        return {"message": "No memories deleted", "deleted": 0}
+    
+    try:
+        # One batched delete against the vector store
+        embedding_ids = [row.embedding_id for row in rows if row.embedding_id]
+        await run_io(memory_service.delete_embeddings, current_user.id, embedding_ids)
+        
+        # One set-based delete against the database, releasing file references
+        # in the same transaction
+        removable = blob_store.release(db, current_user.id, [(row.file_hash, row.file_path) for row in rows])
+        db.query(Memory).filter(
+            Memory.id.in_([row.id for row in rows]),
+            Memory.user_id == current_user.id
+        ).delete(synchronize_session=False)
+        db.commit()
+        
+        # Files nothing references any more are removed after the response is sent
+        if removable:
+            background_tasks.add_task(remove_unreferenced_files, removable)
+        
+        return {"message": "Memories deleted successfully", "deleted": len(rows)}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error deleting memories: {str(e)}")
+
 @router.get("/stats/overview")
 async def get_memory_stats(
     current_user: User = Depends(get_current_active_user),
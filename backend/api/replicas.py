@@ -1,12 +1,17 @@
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from database import get_db
+from pagination import paginate, NEXT_CURSOR_HEADER
 from models.user import User
 from models.replica import Replica
 from api.auth import get_current_active_user
+from services.executors import run_model
+from services.model_registry import ModelUnavailable
+from config import settings
 
 router = APIRouter(prefix="/replicas", tags=["Replicas"])
 
@@ -85,7 +90,8 @@ async def create_replica(
 
 @router.get("/", response_model=List[ReplicaResponse])
 async def get_replicas(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 20,
     status: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -98,7 +104,9 @@ async def get_replicas(
     if status:
         query = query.filter(Replica.status == status)
     
-    replicas = query.order_by(Replica.created_at.desc()).offset(skip).limit(limit).all()
+    replicas, next_cursor = paginate(query, Replica, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return replicas
 
@@ -167,17 +175,16 @@ async def delete_replica(
         raise HTTPException(status_code=404, detail="Replica not found")
     
     try:
-        # Delete associated conversations and messages
+        # Delete associated conversations and messages with set-based statements;
+        # ON DELETE CASCADE covers this too, but older databases predate it
         from models.replica import Conversation, Message
-        conversations = db.query(Conversation).filter(
+        conversation_ids = select(Conversation.id).where(Conversation.replica_id == replica_id)
+        db.query(Message).filter(
+            Message.conversation_id.in_(conversation_ids)
+        ).delete(synchronize_session=False)
+        db.query(Conversation).filter(
             Conversation.replica_id == replica_id
-        ).all()
-        
-        for conv in conversations:
-            # Delete messages in this conversation
-            db.query(Message).filter(Message.conversation_id == conv.id).delete()
-            # Delete the conversation
-            db.delete(conv)
+        ).delete(synchronize_session=False)
         
         # Delete the replica
         db.delete(replica)
@@ -209,10 +216,12 @@ async def train_replica(
         from services.memory_service import memory_service
         
         # Search for memories that mention this person
-        relevant_memories = memory_service.search_memories(
+        relevant_memories = await run_model(
+            memory_service.search_memories,
             query=replica.name,
             user_id=current_user.id,
-            limit=100  # Get more memories for training
+            limit=100,  # Get more memories for training
+            mmr_lambda=settings.MMR_LAMBDA_TRAINING  # Broad coverage over repeats
         )
         
         # Filter for high-relevance memories
@@ -231,7 +240,7 @@ async def train_replica(
         replica.memory_collection_id = collection_name
         
         # Store replica-specific memories in ChromaDB
-        if training_memories:
+        def store_training_memories():
             collection = memory_service.chroma_client.create_collection(
                 name=collection_name,
                 get_or_create=True
@@ -251,6 +260,9 @@ async def train_replica(
                 ids=ids
             )
         
+        if training_memories:
+            await run_model(store_training_memories)
+        
         db.commit()
         db.refresh(replica)
         
@@ -260,6 +272,8 @@ async def train_replica(
             "training_status": replica.training_status
         }
         
+    except ModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         replica.training_status = "untrained"
         db.commit()
@@ -288,7 +302,8 @@ async def get_replica_memories(
         
         # Search for memories mentioning this person
         search_query = query if query else replica.name
-        memories = memory_service.search_memories(
+        memories = await run_model(
+            memory_service.search_memories,
             query=search_query,
             user_id=current_user.id,
             limit=limit
@@ -306,6 +321,8 @@ async def get_replica_memories(
             "memories": relevant_memories
         }
         
+    except ModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving memories: {str(e)}")
 
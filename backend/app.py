@@ -1,9 +1,13 @@
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from database import create_tables
+from database import create_tables, async_engine
 from config import settings
+from pagination import NEXT_CURSOR_HEADER
 from api import auth, memories, chat, replicas
+from services.executors import pool_stats, shutdown_pools, event_loop_monitor
+from services.model_registry import model_registry
 import uvicorn
 
 # Create FastAPI app
@@ -20,8 +24,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=[settings.FRONTEND_URL],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "HEAD", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Accept-Ranges", "Content-Range", "ETag"],
 )
 
 # Exception handler
@@ -54,7 +59,11 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "ECHO API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "executors": pool_stats(),
+        "event_loop": event_loop_monitor.stats(),
+        "models": model_registry.status(),
+        "models_ready": model_registry.ready()
     }
 
 # Startup event
@@ -62,13 +71,26 @@ async def health_check():
 async def startup_event():
     """Initialize database tables on startup."""
     create_tables()
+    
+    # Flag handlers that block the event loop while developing
+    if settings.DEBUG:
+        event_loop_monitor.start()
+    
+    # Load ML models in the background rather than on the first request that needs them
+    if settings.LOAD_MODELS and settings.WARM_UP_MODELS:
+        app.state.model_warm_up = asyncio.create_task(model_registry.warm_up())
+    
     print("ECHO API is starting up...")
     print(f"Debug mode: {settings.DEBUG}")
     print(f"CORS origins: {settings.FRONTEND_URL}")
+    print(f"ML models: {'enabled' if settings.LOAD_MODELS else 'disabled'}")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
+    event_loop_monitor.stop()
+    shutdown_pools()
+    await async_engine.dispose()
     print("ECHO API is shutting down...")
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+"""Backfill emotions and entities for memories that were never enriched.
+
+Memories stored while enrichment was unavailable (or by the simplified
+service) have no emotion scores or entities. This job walks them in id order,
+enriches each batch together (one vectorized local pass, or shared OpenAI
+requests with ENRICHMENT_BACKEND=openai) and writes the batch back in one bulk
+update. The last id done is saved after every batch, so an interrupted run
+picks up where it stopped:
+
+    python backfill_enrichment.py
+    python backfill_enrichment.py --batch-size 50 --pause 5 --user-id 3
+    python backfill_enrichment.py --restart
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Text, cast, or_, select, update
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal, unit_of_work
+from models.memory import Memory
+from services.enrichment import memory_columns
+from services.local_enrichment import known_people
+from services.memory_service import memory_service
+
+DEFAULT_CHECKPOINT = "./backfill_enrichment.json"
+
+def needs_enrichment():
+    """Memories with no emotion scores (or only old placeholder ones) or no entity list."""
+    return or_(
+        Memory.emotions.is_(None),
+        ~cast(Memory.emotions, Text).contains('"joy"'),
+        Memory.people_mentioned.is_(None),
+        cast(Memory.people_mentioned, Text) == "null"
+    )
+
+def load_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(json.load(f).get("last_id", 0))
+
+def save_checkpoint(path: str, last_id: int):
+    # Written to a temp file first so a crash never leaves it half-written
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"last_id": last_id}, f)
+    os.replace(temp_path, path)
+
+def enrich_batch(db: Session, after_id: int, batch_size: int, user_id: Optional[int],
+                 people_by_user: Dict[int, list]) -> Tuple[int, int]:
+    """Enrich the next batch after `after_id`; returns how many were done and the last id."""
+    query = (
+        select(Memory.id, Memory.user_id, Memory.content)
+        .where(Memory.id > after_id, needs_enrichment())
+        .order_by(Memory.id)
+        .limit(batch_size)
+    )
+    if user_id is not None:
+        query = query.where(Memory.user_id == user_id)
+    rows = db.execute(query).all()
+    if not rows:
+        return 0, after_id
+
+    # Each user's replicas are the gazetteer for their memories, so enrich per user
+    updates: List[Dict[str, Any]] = []
+    for owner in sorted({row.user_id for row in rows}):
+        if owner not in people_by_user:
+            people_by_user[owner] = known_people(db, owner)
+        owned = [row for row in rows if row.user_id == owner]
+        results = memory_service.enrich_batch([row.content or "" for row in owned], people_by_user[owner])
+        for row, result in zip(owned, results):
+            updates.append({"id": row.id, **memory_columns(result)})
+
+    # One bulk UPDATE by primary key for the whole batch
+    with unit_of_work(db):
+        db.execute(update(Memory), updates)
+    return len(rows), rows[-1].id
+
+def run(batch_size: int, pause_seconds: float, checkpoint: str, restart: bool = False,
+        user_id: Optional[int] = None, limit: Optional[int] = None):
+    last_id = 0 if restart else load_checkpoint(checkpoint)
+    if last_id:
+        print(f"Resuming after memory {last_id}")
+
+    people_by_user: Dict[int, list] = {}
+    done = 0
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        while limit is None or done < limit:
+            size = batch_size if limit is None else min(batch_size, limit - done)
+            batch_started = time.perf_counter()
+            count, last_id = enrich_batch(db, last_id, size, user_id, people_by_user)
+            if not count:
+                break
+            done += count
+            save_checkpoint(checkpoint, last_id)
+            print(f"Enriched {count} memories through {last_id} in {time.perf_counter() - batch_started:.1f}s")
+
+            # Throttle so the database and the enrichment API keep serving requests
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+    finally:
+        db.close()
+    print(f"Backfill enriched {done} memories, through {last_id}, in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich memories that have no emotions or entities yet.")
+    parser.add_argument("--batch-size", type=int, default=settings.ENRICHMENT_BACKFILL_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.ENRICHMENT_BACKFILL_PAUSE_SECONDS,
+                        help="seconds to wait between batches")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="file recording the last id done")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first memory")
+    parser.add_argument("--user-id", type=int, default=None, help="only this user's memories")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many memories")
+    args = parser.parse_args()
+
+    try:
+        run(args.batch_size, args.pause, args.checkpoint, restart=args.restart, user_id=args.user_id, limit=args.limit)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume from the checkpoint")
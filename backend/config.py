@@ -8,11 +8,33 @@ class Settings:
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./echo.db")
     
+    # Connection pool settings (server databases such as PostgreSQL)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    
+    # SQLite tuning (ignored for other databases)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # 64MB
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))  # 256MB
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-jwt-key-change-this-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     
+    # Authentication cache (verified token -> user snapshot). The TTL is the
+    # longest a deactivation made outside this process takes to apply
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Password hashing pool and login throttling
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+    LOGIN_RATE_LIMIT_ATTEMPTS: int = int(os.getenv("LOGIN_RATE_LIMIT_ATTEMPTS", "10"))
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", "60"))
+    
     # AI API settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
@@ -31,8 +53,105 @@ class Settings:
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
     
+    # Executor pools for blocking service calls
+    IO_POOL_WORKERS: int = int(os.getenv("IO_POOL_WORKERS", "32"))
+    MODEL_POOL_WORKERS: int = int(os.getenv("MODEL_POOL_WORKERS", str(os.cpu_count() or 2)))
+    CPU_POOL_WORKERS: int = int(os.getenv("CPU_POOL_WORKERS", str(os.cpu_count() or 2)))
+    EVENT_LOOP_BLOCK_THRESHOLD_MS: int = int(os.getenv("EVENT_LOOP_BLOCK_THRESHOLD_MS", "100"))
+    
     # File upload settings
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
     UPLOAD_FOLDER: str = os.getenv("UPLOAD_FOLDER", "./uploads")
+    upload_directory = UPLOAD_FOLDER
+    max_file_size = MAX_FILE_SIZE
+    
+    # Image derivatives (longest edge in pixels) generated at upload time
+    IMAGE_THUMB_SIZE: int = int(os.getenv("IMAGE_THUMB_SIZE", "256"))
+    IMAGE_PREVIEW_SIZE: int = int(os.getenv("IMAGE_PREVIEW_SIZE", "1024"))
+    IMAGE_DERIVATIVE_QUALITY: int = int(os.getenv("IMAGE_DERIVATIVE_QUALITY", "80"))
+    
+    # OCR engine for image memories
+    OCR_POOL_WORKERS: int = int(os.getenv("OCR_POOL_WORKERS", str(os.cpu_count() or 2)))
+    OCR_TIMEOUT_SECONDS: int = int(os.getenv("OCR_TIMEOUT_SECONDS", "30"))
+    OCR_LANGUAGE: str = os.getenv("OCR_LANGUAGE", "eng")
+    OCR_MAX_EDGE: int = int(os.getenv("OCR_MAX_EDGE", "2000"))  # longest edge in pixels
+    OCR_SKIP_TEXTLESS: bool = os.getenv("OCR_SKIP_TEXTLESS", "True").lower() == "true"
+    OCR_MIN_EDGE_DENSITY: float = float(os.getenv("OCR_MIN_EDGE_DENSITY", "0.01"))
+    OCR_MIN_CONTRAST_SEPARATION: float = float(os.getenv("OCR_MIN_CONTRAST_SEPARATION", "0.5"))
+    
+    # ML models: loaded on first use, or at startup with WARM_UP_MODELS.
+    # API-only workers set LOAD_MODELS=false to never load them.
+    LOAD_MODELS: bool = os.getenv("LOAD_MODELS", "True").lower() == "true"
+    WARM_UP_MODELS: bool = os.getenv("WARM_UP_MODELS", "False").lower() == "true"
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    # Memories are embedded as overlapping passages of whole sentences, short
+    # enough for the embedding model (MiniLM reads ~256 tokens); search
+    # fetches extra passages per result so they can be grouped by memory
+    PASSAGE_MAX_WORDS: int = int(os.getenv("PASSAGE_MAX_WORDS", "150"))
+    PASSAGE_OVERLAP_WORDS: int = int(os.getenv("PASSAGE_OVERLAP_WORDS", "30"))
+    PASSAGE_SEARCH_OVERSAMPLE: int = int(os.getenv("PASSAGE_SEARCH_OVERSAMPLE", "4"))
+    PASSAGES_PER_RESULT: int = int(os.getenv("PASSAGES_PER_RESULT", "2"))
+    
+    # Conversation context: search candidates are re-scored on similarity,
+    # recency, emotional intensity and how often they've been used, then kept
+    # if similar enough and within a fraction of the best score
+    RETRIEVAL_CANDIDATE_MULTIPLIER: int = int(os.getenv("RETRIEVAL_CANDIDATE_MULTIPLIER", "3"))
+    RETRIEVAL_WEIGHT_SIMILARITY: float = float(os.getenv("RETRIEVAL_WEIGHT_SIMILARITY", "0.6"))
+    RETRIEVAL_WEIGHT_RECENCY: float = float(os.getenv("RETRIEVAL_WEIGHT_RECENCY", "0.2"))
+    RETRIEVAL_WEIGHT_EMOTION: float = float(os.getenv("RETRIEVAL_WEIGHT_EMOTION", "0.1"))
+    RETRIEVAL_WEIGHT_ACCESS: float = float(os.getenv("RETRIEVAL_WEIGHT_ACCESS", "0.1"))
+    RETRIEVAL_RECENCY_HALF_LIFE_DAYS: float = float(os.getenv("RETRIEVAL_RECENCY_HALF_LIFE_DAYS", "365"))
+    RETRIEVAL_MIN_SIMILARITY: float = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.2"))
+    RETRIEVAL_RELATIVE_THRESHOLD: float = float(os.getenv("RETRIEVAL_RELATIVE_THRESHOLD", "0.8"))
+    # Maximal marginal relevance trade-off per use: 1 ranks purely by
+    # relevance, lower values favour memories unlike those already picked
+    MMR_LAMBDA_SELF_CHAT: float = float(os.getenv("MMR_LAMBDA_SELF_CHAT", "0.7"))
+    MMR_LAMBDA_REPLICA_CHAT: float = float(os.getenv("MMR_LAMBDA_REPLICA_CHAT", "0.6"))
+    MMR_LAMBDA_TRAINING: float = float(os.getenv("MMR_LAMBDA_TRAINING", "0.4"))
+    CHROMA_PERSIST_DIRECTORY: str = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_data")
+    chroma_persist_directory = CHROMA_PERSIST_DIRECTORY
+    
+    # Memory enrichment (emotions and entities): "local" scores offline from
+    # word lists and the user's replicas, "openai" makes one JSON-mode call per
+    # memory and falls back to local when it fails
+    ENRICHMENT_BACKEND: str = os.getenv("ENRICHMENT_BACKEND", "local").lower()
+    ENRICHMENT_MODEL: str = os.getenv("ENRICHMENT_MODEL", "gpt-3.5-turbo-1106")
+    ENRICHMENT_CACHE_MAX_ENTRIES: int = int(os.getenv("ENRICHMENT_CACHE_MAX_ENTRIES", "10000"))
+    # Backfill job (backfill_enrichment.py): memories read per database batch,
+    # memories per OpenAI request, and pause between batches to throttle it
+    ENRICHMENT_BACKFILL_BATCH_SIZE: int = int(os.getenv("ENRICHMENT_BACKFILL_BATCH_SIZE", "200"))
+    ENRICHMENT_LLM_BATCH_SIZE: int = int(os.getenv("ENRICHMENT_LLM_BATCH_SIZE", "10"))
+    ENRICHMENT_BACKFILL_PAUSE_SECONDS: float = float(os.getenv("ENRICHMENT_BACKFILL_PAUSE_SECONDS", "1"))
+    
+    # Shared model server (model_server.py); when set, workers send embedding
+    # and transcription work to it instead of loading models themselves
+    MODEL_SERVER_SOCKET: str = os.getenv("MODEL_SERVER_SOCKET", "")
+    MODEL_SERVER_TIMEOUT_SECONDS: int = int(os.getenv("MODEL_SERVER_TIMEOUT_SECONDS", "600"))
+    MODEL_SERVER_MAX_BATCH: int = int(os.getenv("MODEL_SERVER_MAX_BATCH", "64"))
+    MODEL_SERVER_BATCH_WAIT_MS: int = int(os.getenv("MODEL_SERVER_BATCH_WAIT_MS", "5"))
+    
+    # Whisper transcription engine for voice memories
+    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "base")
+    WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "cpu")
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # int8, float32 or float16 (GPU)
+    WHISPER_LANGUAGE: str = os.getenv("WHISPER_LANGUAGE", "")  # empty to auto-detect
+    WHISPER_WORKERS: int = int(os.getenv("WHISPER_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    WHISPER_CHUNK_SECONDS: int = int(os.getenv("WHISPER_CHUNK_SECONDS", "120"))
+    WHISPER_MIN_SILENCE_SECONDS: float = float(os.getenv("WHISPER_MIN_SILENCE_SECONDS", "0.5"))
+    WHISPER_SILENCE_DB: float = float(os.getenv("WHISPER_SILENCE_DB", "-35"))  # relative to the loudest frame
+    
+    # Bulk import of chat exports, mailboxes and journals (POST /memories/import,
+    # import_memories.py). Chat messages closer together than the gap are
+    # grouped into one memory, up to the message and character limits.
+    IMPORT_MAX_FILE_SIZE: int = int(os.getenv("IMPORT_MAX_FILE_SIZE", "209715200"))  # 200MB
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+    IMPORT_GROUP_GAP_MINUTES: int = int(os.getenv("IMPORT_GROUP_GAP_MINUTES", "30"))
+    IMPORT_MAX_MESSAGES_PER_MEMORY: int = int(os.getenv("IMPORT_MAX_MESSAGES_PER_MEMORY", "50"))
+    IMPORT_MAX_MEMORY_CHARS: int = int(os.getenv("IMPORT_MAX_MEMORY_CHARS", "4000"))
+    
+    # Archive export (GET /memories/export, export_memories.py): rows fetched
+    # per server-side cursor batch, and bytes buffered per response chunk
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+    EXPORT_BUFFER_BYTES: int = int(os.getenv("EXPORT_BUFFER_BYTES", "65536"))
 
 settings = Settings() 
\ No newline at end of file
@@ -1,19 +1,84 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager, asynccontextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from config import settings
 
+def _async_database_url(url: str) -> str:
+    """Map the configured sync DATABASE_URL onto its asyncio driver."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg://", 1)
+    return url
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _engine_options(url: str) -> dict:
+    """Pool strategy for the configured database.
+
+    SQLite is a local file, so connections are cheap and never go stale; a
+    server database gets a sized pool with liveness checks and recycling.
+    """
+    if _is_sqlite(url):
+        options = {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            }
+        }
+        # In-memory databases only exist per connection, so share a single one
+        if ":memory:" in url or url.rstrip("/").endswith(":"):
+            options["poolclass"] = StaticPool
+        return options
+    
+    return {
+        "pool_pre_ping": True,
+        "pool_recycle": 300,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite production profile to every new connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    **_engine_options(settings.DATABASE_URL)
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers, so DB waits don't block the event loop
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    echo=settings.DEBUG,
+    **_engine_options(settings.DATABASE_URL)
+)
+
+if _is_sqlite(settings.DATABASE_URL):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# Objects stay usable after commit since handlers return them for serialization
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -25,6 +90,35 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@contextmanager
+def unit_of_work(db: Session):
+    """Commit everything written inside the block once, or roll it all back.
+
+    Call db.flush() inside the block when generated ids are needed, and keep
+    slow work (LLM calls, model inference) outside so the transaction is short.
+    """
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+@asynccontextmanager
+async def async_unit_of_work(db: AsyncSession):
+    """Async counterpart of unit_of_work for AsyncSession handlers."""
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
 # Create all tables
 def create_tables():
     Base.metadata.create_all(bind=engine) 
\ No newline at end of file
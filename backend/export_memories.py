@@ -0,0 +1,35 @@
+"""Export a user's whole archive to an NDJSON or zip file.
+
+Memories, conversations, messages and replicas are read through server-side
+cursors and written as they arrive, so memory use stays flat however many
+years of memories there are. A zip can also carry the original uploads:
+
+    python export_memories.py --user-id 3 -o archive.ndjson
+    python export_memories.py --user-id 3 --format zip --include-files -o archive.zip
+"""
+import argparse
+import asyncio
+import time
+from services.archive_export import EXPORT_FORMATS, export_archive
+
+async def run(user_id: int, output: str, export_format: str, include_files: bool = False):
+    started = time.perf_counter()
+    size = 0
+    with open(output, "wb") as out:
+        async for chunk in export_archive(user_id, export_format, include_files):
+            out.write(chunk)
+            size += len(chunk)
+    print(f"Exported user {user_id} to {output} ({size} bytes) in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a user's memories, conversations and replicas.")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("-o", "--output", required=True, help="file to write")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None, help="defaults to the output file's extension")
+    parser.add_argument("--include-files", action="store_true", help="add original uploads (zip only)")
+    args = parser.parse_args()
+
+    export_format = args.format or ("zip" if args.output.lower().endswith(".zip") else "ndjson")
+    if args.include_files and export_format != "zip":
+        parser.error("--include-files needs a zip export")
+    asyncio.run(run(args.user_id, args.output, export_format, include_files=args.include_files))
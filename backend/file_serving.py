@@ -0,0 +1,184 @@
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+import aiofiles
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Files are read in chunks of this size when the server can't send them zero-copy
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Clients may keep files but must revalidate; unchanged files cost a 304
+FILE_CACHE_CONTROL = "private, no-cache"
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+class FileRangeResponse(Response):
+    """Streams bytes start..end (inclusive) of a file.
+
+    Uses the ASGI zero-copy extension (sendfile) when the server offers it,
+    and falls back to chunked reads otherwise.
+    """
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: dict, media_type: str):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        count = self.end - self.start + 1
+        if scope["method"] == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopy" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+
+        async with aiofiles.open(self.path, "rb") as file:
+            await file.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank while being sent; end the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single byte range into inclusive (start, end).
+
+    Returns None when the header should be ignored and the whole file served,
+    which includes multi-range requests.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise _RangeNotSatisfiable()
+            return max(0, size - suffix), size - 1
+
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise _RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag."""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(mtime) <= since.timestamp()
+
+def _if_range_matches(header: str, etag: str, last_modified: str) -> bool:
+    """If-Range needs a strong ETag match or the exact Last-Modified date."""
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == etag
+    return header == last_modified
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"inline; filename*=utf-8''{quoted}"
+    return f'inline; filename="{filename}"'
+
+def file_response(request: Request, path: str, filename: Optional[str] = None,
+                  etag: Optional[str] = None, media_type: Optional[str] = None) -> Response:
+    """Serve a file with Range (206), ETag/Last-Modified validators and conditional 304s.
+
+    `etag` should be a content hash where one is known; otherwise one is
+    derived from the file's size and modification time.
+    """
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    size = stat_result.st_size
+    etag = f'"{etag}"' if etag else f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    if media_type is None:
+        media_type = mimetypes.guess_type(filename or path)[0] or "application/octet-stream"
+
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": FILE_CACHE_CONTROL,
+    }
+
+    # Conditional GET: If-None-Match wins over If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, stat_result.st_mtime)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    if filename:
+        headers["content-disposition"] = _content_disposition(filename)
+
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or _if_range_matches(if_range, etag, last_modified)):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except _RangeNotSatisfiable:
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+    headers["content-length"] = str(end - start + 1)
+    return FileRangeResponse(path, start, end, status_code, headers, media_type)
@@ -0,0 +1,55 @@
+"""Bulk-import memories from a chat export, mailbox or journal file.
+
+Supports WhatsApp text exports, mbox files and JSON, JSON Lines or Markdown
+journals. The file is parsed as a stream, chat messages are grouped into
+conversation memories, and memories are stored in chunks: one multi-row
+insert and one batched embedding call per chunk. Emotions and entities are
+filled in afterwards, or left to backfill_enrichment.py with --defer-enrichment:
+
+    python import_memories.py --user-id 3 "WhatsApp Chat with Mom.txt"
+    python import_memories.py --user-id 3 --format json journal.jsonl
+    python import_memories.py --user-id 3 --defer-enrichment archive.mbox
+"""
+import argparse
+import time
+from config import settings
+from database import SessionLocal
+from services.memory_import import (
+    IMPORT_FORMATS, ImportInterrupted, detect_format, parse_file, import_memories, enrich_memories
+)
+from services.memory_service import memory_service
+
+def run(path: str, user_id: int, import_format: str, chunk_size: int, defer_enrichment: bool = False):
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        try:
+            memory_ids = import_memories(db, memory_service, user_id, parse_file(path, import_format), chunk_size)
+            print(f"Imported {len(memory_ids)} memories from {path} in {time.perf_counter() - started:.1f}s")
+        except ImportInterrupted as e:
+            # The chunks stored before the error are kept, so enrich those
+            memory_ids = e.memory_ids
+            print(f"Import stopped after {len(memory_ids)} memories: {e.error}")
+        if not memory_ids:
+            return
+
+        if defer_enrichment:
+            print("Enrichment deferred; run backfill_enrichment.py to fill in emotions and entities")
+            return
+        started = time.perf_counter()
+        enrich_memories(db, memory_service, user_id, memory_ids)
+        print(f"Enriched {len(memory_ids)} memories in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import memories from an export file.")
+    parser.add_argument("path", help="WhatsApp .txt export, .mbox, .json/.jsonl or .md journal")
+    parser.add_argument("--user-id", type=int, required=True, help="user the memories belong to")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="defaults to a guess from the file name")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE)
+    parser.add_argument("--defer-enrichment", action="store_true", help="leave enrichment to the backfill job")
+    args = parser.parse_args()
+
+    run(args.path, args.user_id, args.format or detect_format(args.path), args.chunk_size,
+        defer_enrichment=args.defer_enrichment)
@@ -0,0 +1,155 @@
+"""Local model server shared by every API worker on a machine.
+
+Loads the embedding model and the Whisper transcription workers once and
+serves them over a Unix socket, so API workers don't each hold a copy of the
+weights. Embedding requests that arrive together are encoded as one batch.
+
+Run it next to the API and point the workers at its socket:
+
+    MODEL_SERVER_SOCKET=/tmp/echo-models.sock python model_server.py
+    MODEL_SERVER_SOCKET=/tmp/echo-models.sock uvicorn app:app --workers 4
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from config import settings
+from services.executors import shutdown_pools
+from services.model_client import pack_message, unpack_prefix, FRAME_PREFIX_SIZE
+from services.model_registry import model_registry
+from services.transcription_engine import transcription_engine
+
+class ModelServer:
+    def __init__(self, socket_path: str, max_batch: int, batch_wait_ms: int):
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = asyncio.Queue()
+
+        # One encoder thread: torch already spreads each batch over the cores,
+        # and requests that arrive while it's busy make up the next batch
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+        self._transcriber = ThreadPoolExecutor(max_workers=settings.WHISPER_WORKERS, thread_name_prefix="transcribe")
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        # Load up front so workers never wait on a cold server
+        model_registry.get("embedding")
+        if settings.WARM_UP_MODELS:
+            await asyncio.get_running_loop().run_in_executor(self._transcriber, model_registry.get, "whisper")
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        batcher = asyncio.create_task(self._batch_embeddings())
+        print(f"Model server listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._encoder.shutdown(wait=False)
+            self._transcriber.shutdown(wait=False)
+            shutdown_pools()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one worker connection until it closes."""
+        try:
+            while True:
+                try:
+                    header_size, payload_size = unpack_prefix(await reader.readexactly(FRAME_PREFIX_SIZE))
+                except asyncio.IncompleteReadError:
+                    break
+                request = json.loads(await reader.readexactly(header_size))
+                if payload_size:
+                    await reader.readexactly(payload_size)
+
+                try:
+                    response, payload = await self._dispatch(request)
+                except Exception as e:
+                    response, payload = {"error": str(e)}, b""
+                writer.write(pack_message(response, payload))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        op = request.get("op")
+        if op == "ping":
+            return {"models": model_registry.status()}, b""
+        if op == "embed":
+            vectors = await self._embed(request["texts"])
+            return {"shape": list(vectors.shape)}, vectors.tobytes()
+        if op == "transcribe":
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(self._transcriber, transcription_engine.transcribe, request["path"])
+            return {"text": text}, b""
+        raise ValueError(f"Unknown operation: {op}")
+
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((texts, future))
+        return await future
+
+    async def _batch_embeddings(self):
+        """Collect queued embedding requests into batches and encode each in one call."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0][0])
+            deadline = loop.time() + self.batch_wait
+            while count < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining > 0:
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                elif not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    break
+                batch.append(item)
+                count += len(item[0])
+
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = await loop.run_in_executor(self._encoder, self._encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = model_registry.get("embedding").encode(texts, batch_size=self.max_batch)
+        return np.asarray(vectors, dtype=np.float32)
+
+if __name__ == "__main__":
+    if not settings.MODEL_SERVER_SOCKET:
+        raise SystemExit("Set MODEL_SERVER_SOCKET to the Unix socket path to listen on")
+
+    # This process is the one that loads models, not a client of itself
+    model_registry.use_model_server = False
+    server = ModelServer(
+        settings.MODEL_SERVER_SOCKET,
+        max_batch=settings.MODEL_SERVER_MAX_BATCH,
+        batch_wait_ms=settings.MODEL_SERVER_BATCH_WAIT_MS
+    )
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
@@ -1,5 +1,6 @@
 from .user import User
 from .memory import Memory
 from .replica import Replica, Conversation, Message
+from .blob import Blob
 
-__all__ = ["User", "Memory", "Replica", "Conversation", "Message"] 
\ No newline at end of file
+__all__ = ["User", "Memory", "Replica", "Conversation", "Message", "Blob"] 
\ No newline at end of file
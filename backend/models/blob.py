@@ -0,0 +1,24 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # Content address of the stored file, per user: uploads are only
+    # deduplicated (and their extracted text reused) within one account
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    
+    # Number of memories pointing at this file; the file is removed at zero
+    ref_count = Column(Integer, nullable=False, default=0)
+    
+    # Transcript or OCR text extracted from the file, reused by duplicate uploads
+    extracted_text = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<Blob(user_id={self.user_id}, sha256='{self.sha256[:12]}', refs={self.ref_count}, size={self.size})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -7,7 +7,7 @@ class Memory(Base):
     __tablename__ = "memories"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Content
     title = Column(String, nullable=True)
@@ -15,6 +15,7 @@ class Memory(Base):
     content_type = Column(String, nullable=False)  # text, voice, image, document
     original_filename = Column(String, nullable=True)
     file_path = Column(String, nullable=True)
+    file_hash = Column(String, nullable=True, index=True)  # SHA-256 of the uploaded file
     
     # Metadata
     source = Column(String, nullable=True)  # whatsapp, email, journal, upload, etc.
@@ -25,6 +26,7 @@ class Memory(Base):
     # AI Processing
     embedding_id = Column(String, nullable=True)  # ChromaDB document ID
     processed = Column(Boolean, default=False)
+    access_count = Column(Integer, default=0)  # Times used as conversation context
     
     # Emotional and contextual data
     emotions = Column(JSON, nullable=True)  # {"joy": 0.8, "sadness": 0.1, etc.}
@@ -39,5 +41,10 @@ class Memory(Base):
     # Relationships
     user = relationship("User", back_populates="memories")
     
+    # Keyset pagination index for (created_at, id) listing per user
+    __table_args__ = (
+        Index("ix_memories_user_created_id", "user_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Memory(id={self.id}, user_id={self.user_id}, type='{self.content_type}', title='{self.title}')>" 
\ No newline at end of file
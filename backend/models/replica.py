@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -7,7 +7,7 @@ class Replica(Base):
     __tablename__ = "replicas"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Basic Info
     name = Column(String, nullable=False)
@@ -46,6 +46,11 @@ class Replica(Base):
     # Relationships
     user = relationship("User", back_populates="replicas")
     
+    # Keyset pagination index for (created_at, id) listing per user
+    __table_args__ = (
+        Index("ix_replicas_user_created_id", "user_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Replica(id={self.id}, name='{self.name}', relationship='{self.relationship_type}', status='{self.status}')>"
 
@@ -53,8 +58,8 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    replica_id = Column(Integer, ForeignKey("replicas.id"), nullable=True)  # None for self-conversations
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    replica_id = Column(Integer, ForeignKey("replicas.id", ondelete="CASCADE"), nullable=True)  # None for self-conversations
     
     # Conversation metadata
     title = Column(String, nullable=True)
@@ -67,13 +72,13 @@ class Conversation(Base):
     # Relationships
     user = relationship("User", back_populates="conversations")
     replica = relationship("Replica")
-    messages = relationship("Message", back_populates="conversation")
+    messages = relationship("Message", back_populates="conversation", passive_deletes=True)
 
 class Message(Base):
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     
     # Message content
     content = Column(Text, nullable=False)
@@ -91,4 +96,9 @@ class Message(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    conversation = relationship("Conversation", back_populates="messages") 
\ No newline at end of file
+    conversation = relationship("Conversation", back_populates="messages")
+    
+    # Keyset pagination index for (created_at, id) listing per conversation
+    __table_args__ = (
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+    ) 
\ No newline at end of file
@@ -19,9 +19,9 @@ class User(Base):
     encryption_key = Column(String, nullable=True)  # User-specific encryption key
     
     # Relationships
-    replicas = relationship("Replica", back_populates="user")
-    conversations = relationship("Conversation", back_populates="user")
-    memories = relationship("Memory", back_populates="user")
+    replicas = relationship("Replica", back_populates="user", passive_deletes=True)
+    conversations = relationship("Conversation", back_populates="user", passive_deletes=True)
+    memories = relationship("Memory", back_populates="user", passive_deletes=True)
     
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>" 
\ No newline at end of file
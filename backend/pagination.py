@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+# Header used to hand the next page cursor back to clients
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor string."""
+    payload = json.dumps({"t": created_at.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _apply_keyset(query: Any, model: Any, cursor: Optional[str], descending: bool, time_column: str) -> Any:
+    """Add the keyset predicate and ordering to a Query or Select."""
+    time_col = getattr(model, time_column)
+    id_col = model.id
+
+    if cursor:
+        cursor_time, cursor_id = decode_cursor(cursor)
+        # Compare against the anchor row's stored value so the predicate is exact
+        # even where the driver formats bound datetimes differently (e.g. SQLite);
+        # the encoded timestamp is only a fallback if the anchor row was deleted.
+        anchor_time = func.coalesce(
+            select(time_col).where(id_col == cursor_id).scalar_subquery(),
+            cursor_time
+        )
+        if descending:
+            query = query.filter(or_(
+                time_col < anchor_time,
+                and_(time_col == anchor_time, id_col < cursor_id)
+            ))
+        else:
+            query = query.filter(or_(
+                time_col > anchor_time,
+                and_(time_col == anchor_time, id_col > cursor_id)
+            ))
+
+    if descending:
+        return query.order_by(time_col.desc(), id_col.desc())
+    return query.order_by(time_col.asc(), id_col.asc())
+
+def _split_page(rows: List[Any], limit: int, time_column: str) -> Tuple[List[Any], Optional[str]]:
+    """Trim the look-ahead row and build the next cursor if there is one."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, time_column), last.id)
+
+def paginate(query: Query, model: Any, cursor: Optional[str], limit: int,
+             descending: bool = True, time_column: str = "created_at") -> Tuple[List[Any], Optional[str]]:
+    """Return one page of `query` ordered by (time_column, id) and the cursor for the next page.
+
+    Pages are found with a keyset predicate on the sort key instead of OFFSET,
+    so every page costs O(limit) regardless of how deep the client has paged.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = _apply_keyset(query, model, cursor, descending, time_column)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    return _split_page(rows, limit, time_column)
+
+async def paginate_async(db: AsyncSession, stmt: Select, model: Any, cursor: Optional[str], limit: int,
+                         descending: bool = True, time_column: str = "created_at") -> Tuple[List[Any], Optional[str]]:
+    """Async counterpart of paginate for a select() run on an AsyncSession."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = _apply_keyset(stmt, model, cursor, descending, time_column)
+
+    result = await db.execute(stmt.limit(limit + 1))
+    return _split_page(list(result.scalars().all()), limit, time_column)
@@ -1,11 +1,13 @@
 import openai
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 from models.replica import Replica, Conversation, Message
 from models.user import User
 from services.memory_service_simple import memory_service
 from config import settings
+from database import unit_of_work
+from pagination import paginate
 import json
 
 class AIService:
@@ -22,22 +24,22 @@ class AIService:
                 Conversation.user_id == user_id
             ).first()
         else:
+            # Persisted together with the first messages below
             conversation = Conversation(
                 user_id=user_id,
                 conversation_type="self",
                 title=f"Chat with past self - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
 
         # Get relevant memory context
         memory_context = memory_service.get_context_for_conversation(user_message, user_id)
         
         # Get conversation history
-        previous_messages = db.query(Message).filter(
-            Message.conversation_id == conversation.id
-        ).order_by(Message.created_at.desc()).limit(10).all()
+        previous_messages = []
+        if conversation.id:
+            previous_messages = db.query(Message).filter(
+                Message.conversation_id == conversation.id
+            ).order_by(Message.created_at.desc()).limit(10).all()
         
         # Build conversation history for context
         conversation_history = []
@@ -66,6 +68,9 @@ Respond in first person as their past self, with warmth, understanding, and pers
         messages.extend(conversation_history[-6:])  # Include recent context
         messages.append({"role": "user", "content": user_message})
 
+        # End the read transaction so no connection is held during the LLM call
+        db.rollback()
+
         try:
             # Get AI response
             response = openai.chat.completions.create(
@@ -78,32 +83,35 @@ Respond in first person as their past self, with warmth, understanding, and pers
             ai_response = response.choices[0].message.content
             tokens_used = response.usage.total_tokens
 
-            # Save user message
-            user_msg = Message(
-                conversation_id=conversation.id,
-                content=user_message,
-                message_type="user"
-            )
-            db.add(user_msg)
-
-            # Save AI response
-            ai_msg = Message(
-                conversation_id=conversation.id,
-                content=ai_response,
-                message_type="ai",
-                tokens_used=tokens_used,
-                model_used="gpt-4"
-            )
-            db.add(ai_msg)
-
-            # Update conversation timestamp
-            conversation.last_message_at = datetime.utcnow()
-            
-            db.commit()
+            # Save conversation, both messages and timestamps in one transaction
+            with unit_of_work(db):
+                db.add(conversation)
+                
+                # Save user message
+                db.add(Message(
+                    conversation=conversation,
+                    content=user_message,
+                    message_type="user"
+                ))
+
+                # Save AI response
+                db.add(Message(
+                    conversation=conversation,
+                    content=ai_response,
+                    message_type="ai",
+                    tokens_used=tokens_used,
+                    model_used="gpt-4"
+                ))
+
+                # Update conversation timestamp
+                conversation.last_message_at = datetime.utcnow()
+                
+                db.flush()
+                saved_conversation_id = conversation.id
 
             return {
                 "response": ai_response,
-                "conversation_id": conversation.id,
+                "conversation_id": saved_conversation_id,
                 "tokens_used": tokens_used,
                 "relevant_memories": memory_context
             }
@@ -111,7 +119,7 @@ Respond in first person as their past self, with warmth, understanding, and pers
         except Exception as e:
             return {
                 "error": f"AI service error: {str(e)}",
-                "conversation_id": conversation.id if conversation else None
+                "conversation_id": conversation_id
             }
 
     def chat_with_replica(self, user_message: str, replica_id: int, user_id: int, db: Session, conversation_id: Optional[int] = None) -> Dict[str, Any]:
@@ -134,23 +142,23 @@ Respond in first person as their past self, with warmth, understanding, and pers
                 Conversation.replica_id == replica_id
             ).first()
         else:
+            # Persisted together with the first messages below
             conversation = Conversation(
                 user_id=user_id,
                 replica_id=replica_id,
                 conversation_type="replica",
                 title=f"Chat with {replica.name} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             )
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
 
         # Get replica-specific memory context
         replica_context = self._get_replica_context(replica, user_message, user_id)
         
         # Get conversation history
-        previous_messages = db.query(Message).filter(
-            Message.conversation_id == conversation.id
-        ).order_by(Message.created_at.desc()).limit(10).all()
+        previous_messages = []
+        if conversation.id:
+            previous_messages = db.query(Message).filter(
+                Message.conversation_id == conversation.id
+            ).order_by(Message.created_at.desc()).limit(10).all()
         
         conversation_history = []
         for msg in reversed(previous_messages):
@@ -164,6 +172,10 @@ Respond in first person as their past self, with warmth, understanding, and pers
         messages = [{"role": "system", "content": system_prompt}]
         messages.extend(conversation_history[-6:])
         messages.append({"role": "user", "content": user_message})
+        replica_name = replica.name
+
+        # End the read transaction so no connection is held during the LLM call
+        db.rollback()
 
         try:
             # Get AI response
@@ -177,66 +189,70 @@ Respond in first person as their past self, with warmth, understanding, and pers
             ai_response = response.choices[0].message.content
             tokens_used = response.usage.total_tokens
 
-            # Save messages
-            user_msg = Message(
-                conversation_id=conversation.id,
-                content=user_message,
-                message_type="user"
-            )
-            db.add(user_msg)
-
-            ai_msg = Message(
-                conversation_id=conversation.id,
-                content=ai_response,
-                message_type="ai",
-                tokens_used=tokens_used,
-                model_used="gpt-4"
-            )
-            db.add(ai_msg)
-
-            # Update timestamps
-            conversation.last_message_at = datetime.utcnow()
-            replica.last_interaction = datetime.utcnow()
-            replica.interaction_count += 1
-            
-            db.commit()
+            # Save conversation, messages and timestamps in one transaction
+            with unit_of_work(db):
+                db.add(conversation)
+                
+                db.add(Message(
+                    conversation=conversation,
+                    content=user_message,
+                    message_type="user"
+                ))
+
+                db.add(Message(
+                    conversation=conversation,
+                    content=ai_response,
+                    message_type="ai",
+                    tokens_used=tokens_used,
+                    model_used="gpt-4"
+                ))
+
+                # Update timestamps
+                conversation.last_message_at = datetime.utcnow()
+                replica.last_interaction = datetime.utcnow()
+                replica.interaction_count += 1
+                
+                db.flush()
+                saved_conversation_id = conversation.id
 
             return {
                 "response": ai_response,
-                "conversation_id": conversation.id,
-                "replica_name": replica.name,
+                "conversation_id": saved_conversation_id,
+                "replica_name": replica_name,
                 "tokens_used": tokens_used
             }
 
         except Exception as e:
             return {
                 "error": f"AI service error: {str(e)}",
-                "conversation_id": conversation.id if conversation else None
+                "conversation_id": conversation_id
             }
 
     def _get_replica_context(self, replica: Replica, query: str, user_id: int) -> str:
         """Get memory context specific to a replica."""
         
         # Search for memories that mention this person
-        person_memories = memory_service.search_memories(
+        person_memories = memory_service.rank_memories(
             f"{replica.name} {query}", 
             user_id, 
-            limit=5
+            limit=5,
+            mmr_lambda=settings.MMR_LAMBDA_REPLICA_CHAT
         )
         
         # Also search for general context
-        general_memories = memory_service.search_memories(query, user_id, limit=3)
+        general_memories = memory_service.rank_memories(
+            query, user_id, limit=3, mmr_lambda=settings.MMR_LAMBDA_REPLICA_CHAT
+        )
         
-        # Combine and format
+        # Combine and format; both lists are already scored and thresholded
         all_memories = person_memories + general_memories
         unique_memories = {m["memory_id"]: m for m in all_memories}.values()
         
         context_parts = []
         for memory in unique_memories:
-            if memory["similarity_score"] > 0.6:
-                timestamp = memory["metadata"].get("timestamp", "Unknown time")
-                content = memory["content"]
-                context_parts.append(f"[{timestamp}]: {content}")
+            timestamp = memory["metadata"].get("timestamp", "Unknown time")
+            content = memory["content"]
+            context_parts.append(f"[{timestamp}]: {content}")
         
         if context_parts:
             return f"Memories involving {replica.name} or related to the current conversation:\n\n" + "\n\n".join(context_parts)
@@ -288,8 +304,9 @@ Respond with love, wisdom, and authenticity as {replica.name}."""
 
         return system_prompt
 
-    def get_conversation_history(self, conversation_id: int, user_id: int, db: Session) -> List[Dict[str, Any]]:
-        """Get conversation history for a specific conversation."""
+    def get_conversation_history(self, conversation_id: int, user_id: int, db: Session,
+                                 cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of conversation history and the cursor for the next page."""
         
         conversation = db.query(Conversation).filter(
             Conversation.id == conversation_id,
@@ -297,11 +314,10 @@ Respond with love, wisdom, and authenticity as {replica.name}."""
         ).first()
         
         if not conversation:
-            return []
+            return [], None
 
-        messages = db.query(Message).filter(
-            Message.conversation_id == conversation_id
-        ).order_by(Message.created_at.asc()).all()
+        query = db.query(Message).filter(Message.conversation_id == conversation_id)
+        messages, next_cursor = paginate(query, Message, cursor, limit, descending=False)
         
         history = []
         for msg in messages:
@@ -313,7 +329,7 @@ Respond with love, wisdom, and authenticity as {replica.name}."""
                 "tokens_used": msg.tokens_used
             })
         
-        return history
+        return history, next_cursor
 
     def get_user_conversations(self, user_id: int, db: Session) -> List[Dict[str, Any]]:
         """Get all conversations for a user."""
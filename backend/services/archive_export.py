@@ -0,0 +1,199 @@
+import json
+import os
+import zipfile
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+import aiofiles
+from sqlalchemy import Table, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from models.memory import Memory
+from models.replica import Replica, Conversation, Message
+from models.user import User
+
+EXPORT_FORMATS = ["ndjson", "zip"]
+
+EXPORT_VERSION = 1
+
+# Read from disk and written to the archive in chunks of this size
+FILE_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Server-side details that mean nothing outside this deployment
+_EXCLUDED_COLUMNS = {
+    "users": {"hashed_password", "encryption_key"},
+    "memories": {"file_path", "embedding_id"},
+}
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _record(record_type: str, table: Table, row: Any) -> Dict[str, Any]:
+    excluded = _EXCLUDED_COLUMNS.get(table.name, set())
+    record = {"type": record_type}
+    record.update({key: _json_value(value) for key, value in row._mapping.items() if key not in excluded})
+    return record
+
+def archive_file_name(memory_id: int, file_hash: Optional[str], file_path: str) -> str:
+    """Where a memory's original file goes in a zip export; shared files are stored once."""
+    if file_hash:
+        return f"files/{file_hash}"
+    return f"files/memory-{memory_id}-{os.path.basename(file_path)}"
+
+async def _stream_rows(db: AsyncSession, stmt) -> AsyncIterator[Any]:
+    """Rows from a server-side cursor, fetched EXPORT_BATCH_SIZE at a time."""
+    result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    # A whole batch per await rather than a round trip to the driver per row
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+async def export_records(db: AsyncSession, user_id: int, include_files: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """Everything a user owns, one JSON-ready record at a time.
+
+    Columns are selected as plain rows (no ORM objects are kept in the
+    session) and read through server-side cursors, so memory use stays flat
+    however large the archive.
+    """
+    user = (await db.execute(select(User.__table__).where(User.id == user_id))).first()
+    record = _record("user", User.__table__, user)
+    yield {
+        "type": "export",
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "user": {key: value for key, value in record.items() if key != "type"}
+    }
+
+    tables = [
+        ("replica", Replica.__table__, select(Replica.__table__).where(Replica.user_id == user_id)),
+        ("conversation", Conversation.__table__, select(Conversation.__table__).where(Conversation.user_id == user_id)),
+        ("message", Message.__table__, select(Message.__table__).join(
+            Conversation, Message.conversation_id == Conversation.id
+        ).where(Conversation.user_id == user_id)),
+    ]
+    for record_type, table, stmt in tables:
+        async for row in _stream_rows(db, stmt.order_by(table.c.id)):
+            yield _record(record_type, table, row)
+
+    stmt = select(Memory.__table__).where(Memory.user_id == user_id).order_by(Memory.id)
+    async for row in _stream_rows(db, stmt):
+        record = _record("memory", Memory.__table__, row)
+        # Point at the original file inside the zip when files are included
+        if include_files and row.file_path:
+            record["file"] = archive_file_name(row.id, row.file_hash, row.file_path)
+        yield record
+
+async def ndjson_chunks(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode records as NDJSON, yielded in chunks of about EXPORT_BUFFER_BYTES."""
+    buffer: List[bytes] = []
+    size = 0
+    async for record in records:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= settings.EXPORT_BUFFER_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+class _ZipBuffer:
+    """Write-only file for zipfile; the response drains what has been written so far.
+
+    zipfile treats it as unseekable and writes each entry's sizes after its
+    data, so entries can be streamed without knowing their size up front.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+# Zip timestamps can't go earlier than this
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+def _zip_date_time(mtime: float) -> tuple:
+    """A file's mtime as a zip timestamp, clamped for files dated before 1980."""
+    try:
+        date_time = datetime.fromtimestamp(mtime).timetuple()[:6]
+    except (OverflowError, OSError, ValueError):
+        return _ZIP_EPOCH
+    return max(date_time, _ZIP_EPOCH)
+
+async def _archive_files(db: AsyncSession, user_id: int) -> AsyncIterator[Any]:
+    """(name, path) of each original file to include, one per stored blob."""
+    # Content-addressed files shared by several memories are listed once
+    stmt = (
+        select(Memory.file_hash, func.min(Memory.file_path).label("file_path"))
+        .where(Memory.user_id == user_id, Memory.file_hash.isnot(None), Memory.file_path.isnot(None))
+        .group_by(Memory.file_hash)
+        .order_by(Memory.file_hash)
+    )
+    async for row in _stream_rows(db, stmt):
+        yield archive_file_name(0, row.file_hash, row.file_path), row.file_path
+
+    stmt = (
+        select(Memory.id, Memory.file_path)
+        .where(Memory.user_id == user_id, Memory.file_hash.is_(None), Memory.file_path.isnot(None))
+        .order_by(Memory.id)
+    )
+    async for row in _stream_rows(db, stmt):
+        yield archive_file_name(row.id, None, row.file_path), row.file_path
+
+async def zip_chunks(db: AsyncSession, user_id: int, include_files: bool = False) -> AsyncIterator[bytes]:
+    """A zip with the NDJSON archive and, optionally, original files streamed from disk."""
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("archive.ndjson", "w", force_zip64=True) as entry:
+            async for chunk in ndjson_chunks(export_records(db, user_id, include_files)):
+                entry.write(chunk)
+                data = buffer.drain()
+                if data:
+                    yield data
+
+        if include_files:
+            async for name, path in _archive_files(db, user_id):
+                if not os.path.isfile(path):
+                    continue
+                # Photos and audio are already compressed
+                info = zipfile.ZipInfo(name, date_time=_zip_date_time(os.path.getmtime(path)))
+                info.compress_type = zipfile.ZIP_STORED
+                with archive.open(info, "w", force_zip64=True) as entry:
+                    async with aiofiles.open(path, "rb") as source:
+                        while True:
+                            chunk = await source.read(FILE_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            entry.write(chunk)
+                            data = buffer.drain()
+                            if data:
+                                yield data
+
+    # The central directory, written when the archive closes
+    yield buffer.drain()
+
+async def export_archive(user_id: int, export_format: str = "ndjson", include_files: bool = False) -> AsyncIterator[bytes]:
+    """Stream a user's archive as NDJSON or zip bytes, with its own database session.
+
+    The session lives as long as the stream rather than the request, since
+    the response body is produced after the endpoint returns.
+    """
+    async with AsyncSessionLocal() as db:
+        if export_format == "zip":
+            async for chunk in zip_chunks(db, user_id, include_files):
+                yield chunk
+        else:
+            async for chunk in ndjson_chunks(export_records(db, user_id)):
+                yield chunk
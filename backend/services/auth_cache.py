@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set
+from config import settings
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of the user fields request handlers need."""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+class AuthCache:
+    """Short-lived, size-bounded cache of verified tokens to user snapshots.
+
+    Entries are dropped when this process updates or deletes the user; other
+    changes (bulk updates, other workers) show up once the TTL runs out.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (snapshot, expires_at)
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        """Return the cached snapshot for a token, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            snapshot, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return snapshot
+
+    def put(self, token: str, snapshot: UserSnapshot, token_expires_at: Optional[float] = None):
+        """Cache a snapshot until the TTL or the token's own expiry, whichever is sooner."""
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (snapshot, expires_at)
+            self._tokens_by_user.setdefault(snapshot.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token for a user, e.g. after an update or deactivation."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_tokens = self._tokens_by_user.get(entry[0].id)
+        if user_tokens is not None:
+            user_tokens.discard(token)
+            if not user_tokens:
+                del self._tokens_by_user[entry[0].id]
+
+# Global instance
+auth_cache = AuthCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, field_validator
+from config import settings
+
+# Emotions scored for every memory
+EMOTIONS = ["joy", "sadness", "anger", "fear", "surprise", "disgust", "trust", "anticipation"]
+
+# Longest entity list kept per memory
+MAX_ENTITIES = 20
+
+ENRICHMENT_PROMPT = (
+    "You analyze personal memories. Return a JSON object with exactly these keys: "
+    "'emotions' (an object scoring each of " + ", ".join(EMOTIONS) + " between 0 and 1), "
+    "'people' (names of people mentioned), 'locations' (places mentioned) and "
+    "'topics' (main themes or subjects discussed, a few words each). "
+    "Use empty arrays when nothing applies."
+)
+
+ENRICHMENT_BATCH_PROMPT = (
+    "You analyze personal memories. You will receive several memories, each starting "
+    "with its number in square brackets. Return a JSON object with one key, 'results': "
+    "an array with one object per memory, in the same order, each with exactly these keys: "
+    "'emotions' (an object scoring each of " + ", ".join(EMOTIONS) + " between 0 and 1), "
+    "'people' (names of people mentioned), 'locations' (places mentioned) and "
+    "'topics' (main themes or subjects discussed, a few words each). "
+    "Use empty arrays when nothing applies."
+)
+
+# Longest memory text sent in a batched request; the start carries most of the signal
+MAX_BATCH_CONTENT_CHARS = 2000
+
+class Enrichment(BaseModel):
+    """Emotion scores and entities for one memory, as returned by the enrichment model."""
+    emotions: Dict[str, float] = {}
+    people: List[str] = []
+    locations: List[str] = []
+    topics: List[str] = []
+
+    @field_validator("emotions", mode="before")
+    @classmethod
+    def score_every_emotion(cls, value: Any) -> Dict[str, float]:
+        # Unknown keys are dropped and missing ones scored 0, clamped to 0..1
+        value = value if isinstance(value, dict) else {}
+        scores = {}
+        for emotion in EMOTIONS:
+            try:
+                scores[emotion] = min(1.0, max(0.0, float(value.get(emotion, 0.0))))
+            except (TypeError, ValueError):
+                scores[emotion] = 0.0
+        return scores
+
+    @field_validator("people", "locations", "topics", mode="before")
+    @classmethod
+    def clean_names(cls, value: Any) -> List[str]:
+        # Strings only, stripped, de-duplicated case-insensitively, in order
+        if not isinstance(value, list):
+            return []
+        names, seen = [], set()
+        for item in value:
+            if not isinstance(item, str) or not item.strip():
+                continue
+            name = item.strip()
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                names.append(name)
+        return names[:MAX_ENTITIES]
+
+class EnrichmentBatch(BaseModel):
+    """Response to a batched enrichment request, one result per memory."""
+    results: List[Enrichment] = []
+
+def empty_enrichment() -> Dict[str, Any]:
+    return Enrichment().model_dump()
+
+def memory_columns(result: Dict[str, Any]) -> Dict[str, Any]:
+    """An enrichment result as Memory column values, for bulk updates."""
+    return {
+        "emotions": result["emotions"],
+        "people_mentioned": result["people"],
+        "locations": result["locations"],
+        "topics": result["topics"]
+    }
+
+class EnrichmentCache:
+    """Size-bounded LRU cache of enrichment results keyed by a hash of the content."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, content: str) -> Optional[Dict[str, Any]]:
+        key = self.key(content)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                return None
+            self._entries.move_to_end(key)
+        # Callers may modify what they get back, so hand out copies
+        return {name: value.copy() for name, value in result.items()}
+
+    def put(self, content: str, result: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        key = self.key(content)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Global instance
+enrichment_cache = EnrichmentCache(max_entries=settings.ENRICHMENT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,197 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config import settings
+
+# Registry of every pool, for metrics and shutdown
+_pools: Dict[str, "ExecutorPool"] = {}
+
+class PoolBusy(Exception):
+    """Raised when a pool's queue is full and new work is turned away."""
+    pass
+
+class ExecutorPool:
+    """A named thread or process pool with an optional queue cap and saturation metrics.
+
+    Blocking service calls are submitted here from async handlers so the event
+    loop keeps serving other requests while they run.
+    """
+
+    def __init__(self, name: str, max_workers: int, kind: str = "thread", max_queue: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.kind = kind
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        _pools[name] = self
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so importing a module never spawns workers
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.name
+                    )
+            return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) on the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def call(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Blocking counterpart of run, for code already running off the event loop.
+
+        Raises concurrent.futures.TimeoutError if no result arrives within `timeout`.
+        """
+        return self.submit(func, *args, **kwargs).result(timeout)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue func(*args, **kwargs) on the pool, subject to the queue cap."""
+        with self._lock:
+            if self.max_queue is not None and self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PoolBusy(f"{self.name} pool is saturated")
+            self._in_flight += 1
+
+        call = functools.partial(func, *args, **kwargs)
+        try:
+            if self.kind == "process":
+                # Process workers can't report back when they start, so only
+                # in-flight work is tracked for them
+                future = self.executor.submit(call)
+            else:
+                future = self.executor.submit(self._call_tracked, call)
+        except BaseException as e:
+            self._finish(e)
+            raise
+        future.add_done_callback(lambda done: self._finish(None if done.cancelled() else done.exception()))
+        return future
+
+    def _finish(self, error: Optional[BaseException]):
+        broken = None
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            if error is not None:
+                self._failed += 1
+            if isinstance(error, BrokenExecutor):
+                # A worker died (e.g. killed for memory); replace the pool so
+                # later calls don't all fail
+                broken, self._executor = self._executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Saturation metrics for this pool."""
+        with self._lock:
+            running = self._running if self.kind == "thread" else min(self._in_flight, self.max_workers)
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "running": running,
+                "queue_depth": self._in_flight - running,
+                "max_queue": self.max_queue,
+                "utilization": round(running / self.max_workers, 2) if self.max_workers else 0.0,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _call_tracked(self, call: Callable) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._running -= 1
+
+# Network and database calls (OpenAI, free AI providers, ChromaDB, file I/O)
+io_pool = ExecutorPool("io", settings.IO_POOL_WORKERS)
+
+# Inference on models held by this process (embeddings, Whisper); torch and
+# numpy release the GIL, so threads run in parallel without copying weights
+model_pool = ExecutorPool("model", settings.MODEL_POOL_WORKERS)
+
+# Pure-Python CPU-bound work that needs its own interpreter; callables and
+# arguments must be picklable
+cpu_pool = ExecutorPool("cpu", settings.CPU_POOL_WORKERS, kind="process")
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    return await io_pool.run(func, *args, **kwargs)
+
+async def run_model(func: Callable, *args, **kwargs) -> Any:
+    return await model_pool.run(func, *args, **kwargs)
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    return await cpu_pool.run(func, *args, **kwargs)
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Saturation metrics for every pool, keyed by pool name."""
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+
+class EventLoopMonitor:
+    """Debug guard that flags stretches where the event loop was blocked."""
+
+    def __init__(self, threshold_ms: int, interval: float = 0.25):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.blocked_count = 0
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "blocked_count": self.blocked_count,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = (loop.time() - started - self.interval) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms > self.threshold_ms:
+                self.blocked_count += 1
+                print(f"Warning: event loop blocked for {lag_ms:.0f}ms (threshold {self.threshold_ms}ms)")
+
+event_loop_monitor = EventLoopMonitor(threshold_ms=settings.EVENT_LOOP_BLOCK_THRESHOLD_MS)
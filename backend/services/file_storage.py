@@ -0,0 +1,258 @@
+import glob
+import hashlib
+import os
+import uuid
+from collections import Counter
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models.blob import Blob
+from database import SessionLocal
+from config import settings
+
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+class FileTooLarge(Exception):
+    """Raised when an upload grows past the configured size limit."""
+    pass
+
+class StoredFile(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    # Where an upload to the blob store waits until its reference is committed
+    temp_path: Optional[str] = None
+    # Owner of a blob store upload; blobs are never shared between users
+    user_id: Optional[int] = None
+
+async def _stream_to_temp(file: UploadFile, directory: str, max_size: int) -> StoredFile:
+    """Stream an upload into a temporary file in `directory`, hashing as it goes.
+
+    Memory use is bounded by the chunk size whatever the upload size, and chunked
+    uploads with no declared size are limited all the same.
+    """
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLarge(f"Upload exceeds {max_size} bytes")
+                hasher.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        await _remove_quietly(temp_path)
+        raise
+
+    return StoredFile(path=temp_path, sha256=hasher.hexdigest(), size=size)
+
+async def save_temporary_upload(file: UploadFile, max_size: int) -> StoredFile:
+    """Stream an upload to a scratch file for one-off processing; the caller removes it."""
+    return await _stream_to_temp(file, os.path.join(settings.upload_directory, "tmp"), max_size)
+
+async def _remove_quietly(path: str):
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error removing file {path}: {e}")
+
+class BlobStore:
+    """Content-addressed file store with reference counting.
+
+    Each distinct file a user uploads is kept once under a path derived from
+    the user and its SHA-256 (sharded two levels deep) and tracked by a Blob
+    row counting the memories that use it, along with any transcript or OCR
+    text already extracted from it. Nothing is shared across users, so an
+    upload reveals nothing about what others have stored.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, user_id: int, sha256: str) -> str:
+        return os.path.join(self.root, str(user_id), sha256[:2], sha256[2:4], sha256)
+
+    def blob_of(self, path: str) -> Optional[Tuple[int, str]]:
+        """(user_id, sha256) of a path in the store, or None for files outside it."""
+        parts = os.path.relpath(path, self.root).split(os.sep)
+        if len(parts) != 4 or not parts[0].isdigit():
+            return None
+        user_id, sha256 = int(parts[0]), parts[3]
+        return (user_id, sha256) if path == self.path_for(user_id, sha256) else None
+
+    def derivative_path(self, user_id: int, sha256: str, variant: str, extension: str) -> str:
+        """Path of a file derived from a blob (e.g. a thumbnail), kept beside it."""
+        return f"{self.path_for(user_id, sha256)}.{variant}.{extension}"
+
+    def derivatives_of(self, blob_path: str) -> List[str]:
+        return glob.glob(f"{glob.escape(blob_path)}.*")
+
+    async def save_upload(self, file: UploadFile, max_size: int, user_id: int) -> StoredFile:
+        """Stream an upload into the store's scratch area, hashing it on the way.
+
+        The content stays at `temp_path`, private to this upload, until
+        finish_upload puts it in place after a Blob row references it, so a
+        failed upload never leaves an unreferenced file in the store.
+        """
+        temp = await _stream_to_temp(file, os.path.join(self.root, "tmp"), max_size)
+        blob_path = self.path_for(user_id, temp.sha256)
+        try:
+            # Derivatives may be rendered beside the blob before it's in place
+            await aiofiles.os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        except BaseException:
+            await _remove_quietly(temp.path)
+            raise
+        return StoredFile(path=blob_path, sha256=temp.sha256, size=temp.size, temp_path=temp.path, user_id=user_id)
+
+    async def finish_upload(self, stored: StoredFile, referenced: bool):
+        """Move an upload into place once its reference is committed, or drop it.
+
+        Content already in place (a duplicate upload) is kept as it is. Runs
+        after the commit, so a concurrent remove_unreferenced_files either sees
+        the reference or has already moved the old file away. A failed upload's
+        derivatives go too, unless they belong to a blob already in place.
+        """
+        if referenced and not await aiofiles.os.path.exists(stored.path):
+            await aiofiles.os.replace(stored.temp_path, stored.path)
+            return
+        await _remove_quietly(stored.temp_path)
+        if not referenced and not await aiofiles.os.path.exists(stored.path):
+            for path in self.derivatives_of(stored.path):
+                await _remove_quietly(path)
+
+    def cached_text(self, db: Session, user_id: int, sha256: str) -> Optional[str]:
+        """Text already extracted from this content, if one of the user's uploads processed it."""
+        blob = db.get(Blob, (user_id, sha256))
+        return blob.extracted_text if blob else None
+
+    def acquire(self, db: Session, stored: StoredFile, extracted_text: Optional[str] = None):
+        """Add a reference to a stored file, creating its Blob row on first use.
+
+        Runs inside the caller's transaction; both statements are atomic so
+        concurrent uploads of the same content count correctly.
+        """
+        values = {"user_id": stored.user_id, "sha256": stored.sha256, "path": stored.path, "size": stored.size, "ref_count": 0}
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            db.execute(pg_insert(Blob).values(**values).on_conflict_do_nothing(index_elements=["user_id", "sha256"]))
+        elif dialect == "sqlite":
+            db.execute(sqlite_insert(Blob).values(**values).on_conflict_do_nothing(index_elements=["user_id", "sha256"]))
+        elif db.get(Blob, (stored.user_id, stored.sha256)) is None:
+            db.add(Blob(**values))
+            db.flush()
+
+        db.execute(
+            update(Blob)
+            .where(Blob.user_id == stored.user_id, Blob.sha256 == stored.sha256)
+            .values(
+                ref_count=Blob.ref_count + 1,
+                extracted_text=func.coalesce(Blob.extracted_text, extracted_text)
+            )
+        )
+
+    def release(self, db: Session, user_id: int, files: Iterable[Tuple[Optional[str], Optional[str]]]) -> List[str]:
+        """Drop references for (file_hash, file_path) pairs of a user's deleted memories.
+
+        Runs inside the caller's transaction and returns the paths that are no
+        longer referenced and should be removed from disk. Files uploaded before
+        the store existed have no Blob row and are returned as-is.
+        """
+        files = [(file_hash, file_path) for file_hash, file_path in files if file_path]
+        counts = Counter(file_hash for file_hash, _ in files if file_hash)
+
+        known = set()
+        removable = []
+        if counts:
+            owned = Blob.user_id == user_id
+            known = set(db.scalars(select(Blob.sha256).where(owned, Blob.sha256.in_(list(counts)))))
+            # Decremented in the database, so concurrent deletes and uploads
+            # can't lose each other's updates
+            for sha256, count in counts.items():
+                if sha256 in known:
+                    db.execute(
+                        update(Blob)
+                        .where(owned, Blob.sha256 == sha256)
+                        .values(ref_count=Blob.ref_count - count)
+                        .execution_options(synchronize_session=False)
+                    )
+            removable = list(db.scalars(
+                delete(Blob)
+                .where(owned, Blob.sha256.in_(list(known)), Blob.ref_count <= 0)
+                .returning(Blob.path)
+                .execution_options(synchronize_session=False)
+            ))
+
+        for file_hash, file_path in files:
+            owner = self.blob_of(file_path)
+            # Never another user's blob, whatever the memory row says
+            if file_hash not in known and (owner is None or owner[0] == user_id):
+                removable.append(file_path)
+        return removable
+
+    def remove_if_unreferenced(self, user_id: int, sha256: str):
+        """Delete a blob's file and derivatives unless a Blob row references it again.
+
+        The file is moved aside before the check: an upload that committed its
+        reference in the meantime gets it moved back, and one that commits
+        afterwards finds it gone and puts its own copy in place.
+        """
+        path = self.path_for(user_id, sha256)
+        aside = os.path.join(self.root, "tmp", f".{sha256}.{uuid.uuid4().hex}.removing")
+        try:
+            os.makedirs(os.path.dirname(aside), exist_ok=True)
+            os.replace(path, aside)
+        except FileNotFoundError:
+            aside = None
+
+        # A new session, so the check sees references committed since the delete
+        db = SessionLocal()
+        try:
+            referenced = db.scalar(
+                select(Blob.sha256).where(Blob.user_id == user_id, Blob.sha256 == sha256)
+            ) is not None
+        finally:
+            db.close()
+
+        if referenced:
+            if aside:
+                os.replace(aside, path)
+            return
+        # Thumbnails and other derivatives go with the original
+        for file_path in ([aside] if aside else []) + self.derivatives_of(path):
+            _remove_file(file_path)
+
+blob_store = BlobStore(os.path.join(settings.upload_directory, "blobs"))
+
+def remove_unreferenced_files(file_paths: List[str]):
+    """Delete files from disk unless a new upload has referenced them again."""
+    for file_path in file_paths:
+        blob = blob_store.blob_of(file_path)
+        if blob is None:
+            # Uploaded before the blob store existed; nothing else shares it
+            _remove_file(file_path)
+            continue
+        try:
+            blob_store.remove_if_unreferenced(*blob)
+        except OSError as e:
+            print(f"Error removing file {file_path}: {e}")
@@ -0,0 +1,93 @@
+import os
+import uuid
+from typing import Dict, List, Optional
+from services.executors import run_cpu
+from services.file_storage import blob_store
+from config import settings
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional; originals are served without it
+    Image = None
+
+# Longest edge in pixels for each derivative size
+IMAGE_SIZES = {
+    "thumb": settings.IMAGE_THUMB_SIZE,
+    "preview": settings.IMAGE_PREVIEW_SIZE,
+}
+
+def _output_format() -> tuple:
+    """(Pillow format, file extension, MIME type) for derivatives: WebP where supported."""
+    if Image is not None and features.check("webp"):
+        return "WEBP", "webp", "image/webp"
+    return "JPEG", "jpg", "image/jpeg"
+
+def render_derivatives(source_path: str, targets: Dict[str, str], quality: int) -> List[str]:
+    """Write downscaled copies of an image to `targets` ({size name: path}).
+
+    Runs in a worker process. Sizes are rendered largest first so each one is
+    resized from the previous, smaller image rather than the original.
+    """
+    image_format, _, _ = _output_format()
+    save_options = {"method": 4} if image_format == "WEBP" else {"optimize": True, "progressive": True}
+    written = []
+    with Image.open(source_path) as source:
+        largest = max(IMAGE_SIZES[name] for name in targets)
+        # Let JPEG decode straight to a reduced scale instead of full resolution
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        mode = "RGBA" if has_alpha and image_format == "WEBP" else "RGB"
+        if image.mode != mode:
+            image = image.convert(mode)
+
+        for name in sorted(targets, key=lambda n: IMAGE_SIZES[n], reverse=True):
+            edge = IMAGE_SIZES[name]
+            image.thumbnail((edge, edge), Image.LANCZOS)
+
+            # Write to a temporary name so readers never see a partial file
+            path = targets[name]
+            temp_path = f"{path}.{uuid.uuid4().hex}.part"
+            try:
+                image.save(temp_path, image_format, quality=quality, **save_options)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            written.append(path)
+    return written
+
+class ImageDerivatives:
+    """Thumbnails and previews of uploaded images, cached next to the stored original.
+
+    Derivatives are keyed by the owner and the original's SHA-256 like the blob
+    itself, so a user's duplicate uploads share them and they are removed
+    along with the blob.
+    """
+
+    def __init__(self):
+        self.image_format, self.extension, self.media_type = _output_format()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def path_for(self, user_id: int, sha256: str, size: str) -> str:
+        return blob_store.derivative_path(user_id, sha256, size, self.extension)
+
+    async def ensure(self, user_id: int, sha256: str, source_path: str,
+                     sizes: Optional[List[str]] = None) -> Dict[str, str]:
+        """Render any missing derivatives on the CPU pool and return their paths by size."""
+        sizes = sizes or list(IMAGE_SIZES)
+        paths = {size: self.path_for(user_id, sha256, size) for size in sizes}
+        if not self.available:
+            return {}
+
+        missing = {size: path for size, path in paths.items() if not os.path.exists(path)}
+        if missing:
+            await run_cpu(render_derivatives, source_path, missing, settings.IMAGE_DERIVATIVE_QUALITY)
+        return paths
+
+# Global instance
+image_derivatives = ImageDerivatives()
@@ -0,0 +1,210 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from models.replica import Replica
+from services.enrichment import EMOTIONS, Enrichment
+
+# A person the user has a replica for: (name, relationship_type)
+KnownPerson = Tuple[str, Optional[str]]
+
+# Words that signal each emotion, matched as whole lowercase tokens
+_EMOTION_WORDS = {
+    "joy": "happy happiness happiest joy joyful glad delighted love loved loving lovely laugh laughed laughing "
+           "smile smiled smiling fun wonderful great amazing beautiful celebrate celebrated proud cheerful "
+           "grateful thankful enjoy enjoyed blessed awesome best favorite favourite",
+    "sadness": "sad sadness cry cried crying tears miss missed missing lonely alone grief grieving lost loss "
+               "died death funeral heartbroken sorrow unhappy depressed regret hurt goodbye passed",
+    "anger": "angry anger mad furious annoyed annoying hate hated rage frustrated frustrating irritated argue "
+             "argued argument fight fought yelled shouted unfair betrayed",
+    "fear": "afraid fear feared scared scary terrified worried worry worrying anxious anxiety nervous panic "
+            "frightened dread danger dangerous accident emergency",
+    "surprise": "surprise surprised surprising unexpected unexpectedly suddenly shocked shock amazed astonished "
+                "wow unbelievable incredible",
+    "disgust": "disgust disgusted disgusting gross awful horrible nasty revolting vile",
+    "trust": "trust trusted safe faith honest loyal rely relied support supported supportive believe believed "
+             "together comfort comforted reliable promise promised",
+    "anticipation": "hope hoping hoped plan planning planned soon tomorrow waiting wait expect expected eager "
+                    "prepare preparing future upcoming someday excited exciting",
+}
+
+# Words that signal each topic
+_TOPIC_WORDS = {
+    "family": "mom mum dad mother father sister brother family kids children son daughter grandma grandpa "
+              "grandmother grandfather wife husband parents aunt uncle cousin baby",
+    "work": "work job office boss meeting project colleague colleagues career interview promotion client",
+    "travel": "trip travel travelled traveled flight flew vacation holiday hotel beach airport journey abroad",
+    "health": "doctor hospital sick ill illness health surgery medicine therapy diagnosis recovery",
+    "education": "school class teacher exam college university study studied graduation homework lecture",
+    "food": "dinner lunch breakfast cooked cooking recipe restaurant meal food cake baked",
+    "celebration": "birthday wedding anniversary party christmas celebration holidays thanksgiving",
+    "friendship": "friend friends friendship buddy",
+    "home": "home house apartment moved garden neighbour neighbor",
+    "music": "music song songs concert sang singing guitar piano band",
+    "sports": "game match football soccer basketball tennis run running gym team",
+    "pets": "dog cat puppy kitten pet pets",
+}
+
+# Words within this many tokens before an emotion word negate it ("not happy")
+_NEGATION_WINDOW = 3
+_NEGATIONS = {"not", "no", "never", "nothing", "hardly", "without", "isn't", "wasn't", "don't", "didn't",
+              "doesn't", "couldn't", "wouldn't", "can't", "won't", "aren't", "weren't"}
+
+# Common names for a relationship, so "Mom" finds the replica whose relationship is "mother"
+_RELATIONSHIP_ALIASES = {
+    "mother": ["mom", "mum", "mama", "mommy", "mummy", "mother"],
+    "father": ["dad", "papa", "daddy", "father"],
+    "grandmother": ["grandma", "granny", "nana", "grandmother"],
+    "grandfather": ["grandpa", "granddad", "grandad", "grandfather"],
+    "wife": ["wife"],
+    "husband": ["husband"],
+}
+
+# Context that marks a capitalized name as a person or a place
+_PERSON_BEFORE = {"with", "met", "meet", "meeting", "told", "tell", "called", "call", "asked", "ask", "hugged",
+                  "thanked", "married", "visited", "saw", "see", "and", "dear", "love", "miss", "missed"}
+_PERSON_AFTER = {"said", "says", "told", "called", "asked", "laughed", "smiled", "cried", "came", "gave",
+                 "and", "who"}
+_PERSON_TITLES = {"mr", "mrs", "ms", "miss", "dr", "aunt", "auntie", "uncle", "grandma", "grandpa", "cousin",
+                  "sister", "brother", "professor", "coach"}
+_PLACE_BEFORE = {"in", "at", "near", "around", "across", "outside", "inside"}
+_MOTION_VERBS = {"went", "go", "going", "goes", "moved", "move", "flew", "fly", "drove", "drive", "travelled",
+                 "traveled", "trip", "back", "way", "headed", "returned", "came"}
+
+# Capitalized words that are never names
+_NOT_NAMES = {
+    "I", "I'm", "I've", "I'd", "I'll", "The", "A", "An", "My", "Our", "We", "He", "She", "They", "It", "This",
+    "That", "Today", "Yesterday", "Tomorrow", "Tonight", "Then", "When", "After", "Before", "But", "And",
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "January", "February",
+    "March", "April", "May", "June", "July", "August", "September", "October", "November", "December",
+    "Christmas", "Easter", "God", "OK", "Mom", "Mum", "Dad",
+}
+
+_CONTEXT_WORDS = _PERSON_BEFORE | _PLACE_BEFORE | _MOTION_VERBS | {"to"}
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_NAME_RE = re.compile(r"\b([A-Z][a-z]+(?:['’]s)?(?:\s+[A-Z][a-z]+)*)")
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+
+def _invert(lexicon: Dict[str, str]) -> Dict[str, List[str]]:
+    index: Dict[str, List[str]] = {}
+    for label, words in lexicon.items():
+        for word in words.split():
+            index.setdefault(word, []).append(label)
+    return index
+
+_EMOTION_INDEX = _invert(_EMOTION_WORDS)
+_TOPIC_INDEX = _invert(_TOPIC_WORDS)
+
+@lru_cache(maxsize=256)
+def _gazetteer(people: Tuple[KnownPerson, ...]) -> Tuple[Optional[re.Pattern], Dict[str, str]]:
+    """One alternation regex over every way of referring to the known people, and alias -> name."""
+    aliases: Dict[str, str] = {}
+    for name, relationship in people:
+        name = name.strip()
+        if not name:
+            continue
+        aliases[name.lower()] = name
+        first_name = name.split()[0]
+        aliases.setdefault(first_name.lower(), name)
+        for alias in _RELATIONSHIP_ALIASES.get((relationship or "").strip().lower(), []):
+            aliases.setdefault(alias, name)
+    if not aliases:
+        return None, aliases
+
+    # Longest first so "Mary Ann" wins over "Mary"
+    alternation = "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE), aliases
+
+class LocalEnricher:
+    """Offline emotion and entity extraction from word lists and simple rules.
+
+    Emotions are scored from a lexicon with negation handling; people are
+    found from the user's replicas (names, first names and relationship words
+    like "Mom") plus capitalized names in person-like context, and places from
+    capitalized names after words like "in" or "went to". Patterns are compiled
+    once and shared across a batch, so enriching is cheap enough to do inline.
+    """
+
+    def enrich(self, content: str, known_people: Sequence[KnownPerson] = ()) -> Dict[str, Any]:
+        return self.enrich_batch([content], known_people)[0]
+
+    def enrich_batch(self, contents: Iterable[str], known_people: Sequence[KnownPerson] = ()) -> List[Dict[str, Any]]:
+        pattern, aliases = _gazetteer(tuple(known_people))
+        results = []
+        for content in contents:
+            tokens = _TOKEN_RE.findall(content.lower())
+            people, locations = self._entities(content, pattern, aliases)
+            results.append(Enrichment(
+                emotions=self._emotions(tokens),
+                people=people,
+                locations=locations,
+                topics=self._topics(tokens),
+            ).model_dump())
+        return results
+
+    def _emotions(self, tokens: List[str]) -> Dict[str, float]:
+        hits: Counter = Counter()
+        for i, token in enumerate(tokens):
+            emotions = _EMOTION_INDEX.get(token)
+            if not emotions:
+                continue
+            if any(previous in _NEGATIONS for previous in tokens[max(0, i - _NEGATION_WINDOW):i]):
+                continue
+            hits.update(emotions)
+        # One mention scores 0.5, approaching 1 as mentions add up
+        return {emotion: round(hits[emotion] / (hits[emotion] + 1), 2) for emotion in EMOTIONS}
+
+    def _topics(self, tokens: List[str], limit: int = 5) -> List[str]:
+        hits: Counter = Counter()
+        for token in tokens:
+            hits.update(_TOPIC_INDEX.get(token, ()))
+        return [topic for topic, _ in hits.most_common(limit)]
+
+    def _entities(self, content: str, pattern: Optional[re.Pattern],
+                  aliases: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        people: List[str] = []
+        locations: List[str] = []
+
+        # Known people first: replica names, first names and relationship words
+        if pattern is not None:
+            for match in pattern.finditer(content):
+                people.append(aliases[match.group(0).lower()])
+
+        # Then capitalized names, classified by the words around them
+        for match in _NAME_RE.finditer(content):
+            possessive = re.search(r"['’]s$", match.group(1)) is not None
+            before = [word.lower() for word in _WORD_RE.findall(content[max(0, match.start() - 40):match.start()])]
+            words = re.sub(r"['’]s$", "", match.group(1)).split()
+
+            # A capitalized sentence start like "Met Bob" or "In Paris" is context, not part of the name
+            while words and (words[0] in _NOT_NAMES or words[0].lower() in _CONTEXT_WORDS):
+                before.append(words.pop(0).lower())
+            if not words:
+                continue
+            name = " ".join(words)
+            if name.lower() in aliases:
+                people.append(aliases[name.lower()])
+                continue
+
+            after = _WORD_RE.findall(content[match.end():match.end() + 20])
+            previous = before[-1] if before else ""
+            two_back = before[-2] if len(before) > 1 else ""
+            following = after[0].lower() if after else ""
+
+            if previous in _PLACE_BEFORE or (previous == "to" and two_back in _MOTION_VERBS):
+                locations.append(name)
+            elif (previous in _PERSON_BEFORE or previous in _PERSON_TITLES or following in _PERSON_AFTER
+                  or possessive):
+                # A possessive ("Anna's") is almost always a person
+                people.append(name)
+        return people, locations
+
+def known_people(db: Session, user_id: int) -> List[KnownPerson]:
+    """The user's replicas as (name, relationship) pairs, to recognise them in memories."""
+    rows = db.query(Replica.name, Replica.relationship_type).filter(Replica.user_id == user_id).all()
+    return [(name, relationship_type) for name, relationship_type in rows]
+
+# Global instance
+local_enricher = LocalEnricher()
@@ -0,0 +1,404 @@
+import email
+import json
+import mailbox
+import os
+import re
+from datetime import datetime, timedelta
+from email.header import decode_header, make_header
+from email.utils import parsedate_to_datetime
+from html import unescape
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from config import settings
+from database import unit_of_work
+from models.memory import Memory
+from services.enrichment import memory_columns
+from services.local_enrichment import known_people
+
+IMPORT_FORMATS = ["whatsapp", "mbox", "json", "markdown"]
+
+# Memory.source for each format
+IMPORT_SOURCES = {"whatsapp": "whatsapp", "mbox": "email", "json": "journal", "markdown": "journal"}
+
+class ImportFormatError(Exception):
+    """Raised when a file's format can't be determined or isn't supported."""
+    pass
+
+class ImportInterrupted(Exception):
+    """Raised when an import fails after some chunks were already stored.
+
+    Carries the ids stored so far, so callers can report and enrich them.
+    """
+    def __init__(self, memory_ids: List[int], error: Exception):
+        super().__init__(str(error))
+        self.memory_ids = memory_ids
+        self.error = error
+
+class ImportedMemory(NamedTuple):
+    content: str
+    title: Optional[str]
+    timestamp: Optional[datetime]
+    source: str
+
+class ChatMessage(NamedTuple):
+    timestamp: datetime
+    sender: str
+    text: str
+
+def detect_format(filename: str) -> str:
+    """Guess the import format from a file name."""
+    name = filename.lower()
+    if name.endswith((".mbox", ".mbx")):
+        return "mbox"
+    if name.endswith((".json", ".jsonl", ".ndjson")):
+        return "json"
+    if name.endswith((".md", ".markdown")):
+        return "markdown"
+    if name.endswith(".txt"):
+        return "whatsapp"
+    raise ImportFormatError(f"Can't tell the format of {filename}; choose one of {', '.join(IMPORT_FORMATS)}")
+
+# Date formats tried for journal headings and JSON dates, after ISO 8601
+_DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d.%m.%Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y",
+                 "%A, %B %d, %Y", "%A %d %B %Y"]
+
+def parse_date(text: str) -> Optional[datetime]:
+    text = text.strip()
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    return None
+
+# WhatsApp exports, Android ("31/12/2020, 21:41 - Alice: hi") or iOS ("[31/12/2020, 21:41:05] Alice: hi")
+_WHATSAPP_LINE = re.compile(
+    r"^\[?(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4}),?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp]\.?\s?[Mm]\.?)?\]?"
+    r"\s*(?:-\s*)?([^:]+?):\s(.*)$"
+)
+_WHATSAPP_SYSTEM = re.compile(r"^\[?\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4},?\s+\d{1,2}:\d{2}")
+_WHATSAPP_MEDIA = {"<Media omitted>", "image omitted", "video omitted", "audio omitted", "sticker omitted",
+                   "GIF omitted", "document omitted"}
+
+def _whatsapp_timestamp(parts: tuple, day_first: bool) -> Optional[datetime]:
+    first, second, year, hour, minute, secs, meridiem = parts
+    day, month = (first, second) if day_first else (second, first)
+    hour = int(hour)
+    if meridiem:
+        is_pm = meridiem.lower().startswith("p")
+        hour = hour % 12 + (12 if is_pm else 0)
+    year = int(year) + (2000 if len(year) == 2 else 0)
+    try:
+        return datetime(year, month, day, hour, int(minute), int(secs or 0))
+    except ValueError:
+        return None
+
+def _whatsapp_lines(lines: Iterable[str]) -> Iterator[tuple]:
+    """(date parts, sender, text) per message, with multi-line messages joined."""
+    current: Optional[list] = None
+    for line in lines:
+        line = line.rstrip("\r\n").replace("‎", "").replace(" ", " ")
+        match = _WHATSAPP_LINE.match(line)
+        if not match:
+            if _WHATSAPP_SYSTEM.match(line):
+                # "Messages are end-to-end encrypted", "Alice added Bob", ...
+                if current is not None:
+                    yield tuple(current)
+                current = None
+            elif current is not None:
+                current[2] = f"{current[2]}\n{line}"
+            continue
+
+        first, second, year, hour, minute, secs, meridiem, sender, text = match.groups()
+        if current is not None:
+            yield tuple(current)
+        current = [(int(first), int(second), year, hour, minute, secs, meridiem), sender.strip(), text]
+    if current is not None:
+        yield tuple(current)
+
+def parse_whatsapp_messages(lines: Iterable[str]) -> Iterator[ChatMessage]:
+    """Stream messages out of a WhatsApp text export, joining multi-line messages.
+
+    Exports don't say whether dates are day- or month-first, so the order is
+    inferred from the first date that settles it (a part above 12). Messages
+    before that are held back until it's known, and read month-first if the
+    export never settles it.
+    """
+    day_first: Optional[bool] = None
+    pending: List[tuple] = []
+    for message in _whatsapp_lines(lines):
+        if day_first is None:
+            pending.append(message)
+            first, second = message[0][:2]
+            if first <= 12 and second <= 12:
+                continue
+            day_first = first > 12
+            ready, pending = pending, []
+        else:
+            ready = [message]
+
+        for parts, sender, text in ready:
+            timestamp = _whatsapp_timestamp(parts, day_first)
+            if timestamp is not None:
+                yield ChatMessage(timestamp, sender, text)
+
+    for parts, sender, text in pending:
+        timestamp = _whatsapp_timestamp(parts, False)
+        if timestamp is not None:
+            yield ChatMessage(timestamp, sender, text)
+
+def group_chat_messages(messages: Iterable[ChatMessage], source: str = "whatsapp") -> Iterator[ImportedMemory]:
+    """Group consecutive messages into conversation memories.
+
+    A new memory starts after a pause longer than IMPORT_GROUP_GAP_MINUTES, or
+    when the current one reaches the message or character limit.
+    """
+    gap = timedelta(minutes=settings.IMPORT_GROUP_GAP_MINUTES)
+    group: List[ChatMessage] = []
+    length = 0
+
+    def flush() -> ImportedMemory:
+        senders = list(dict.fromkeys(message.sender for message in group))
+        return ImportedMemory(
+            content="\n".join(f"{message.sender}: {message.text}" for message in group),
+            title=f"Chat with {', '.join(senders[:3])} on {group[0].timestamp:%Y-%m-%d}",
+            timestamp=group[0].timestamp,
+            source=source
+        )
+
+    for message in messages:
+        if message.text.strip() in _WHATSAPP_MEDIA:
+            continue
+        line_length = len(message.sender) + len(message.text) + 3
+        if group and (
+            message.timestamp - group[-1].timestamp > gap
+            or len(group) >= settings.IMPORT_MAX_MESSAGES_PER_MEMORY
+            or length + line_length > settings.IMPORT_MAX_MEMORY_CHARS
+        ):
+            yield flush()
+            group, length = [], 0
+        group.append(message)
+        length += line_length
+    if group:
+        yield flush()
+
+def _header(message: email.message.Message, name: str) -> str:
+    value = message.get(name)
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return str(value)
+
+def _email_body(message: email.message.Message) -> str:
+    """The plain-text body, or the HTML body stripped of tags, without quoted replies."""
+    plain, html = None, None
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        content_type = part.get_content_type()
+        if content_type not in ("text/plain", "text/html"):
+            continue
+        payload = part.get_payload(decode=True) or b""
+        text = payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+        if content_type == "text/plain" and plain is None:
+            plain = text
+        elif content_type == "text/html" and html is None:
+            html = unescape(re.sub(r"<[^>]+>", " ", re.sub(r"(?is)<(script|style).*?</\1>", " ", text)))
+
+    body = plain if plain is not None else (html or "")
+    lines = [line.rstrip() for line in body.splitlines() if not line.startswith(">")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def parse_mbox(path: str) -> Iterator[ImportedMemory]:
+    """One memory per email in an mbox file; messages are read one at a time."""
+    for message in mailbox.mbox(path, create=False):
+        body = _email_body(message)
+        if not body:
+            continue
+        try:
+            timestamp = parsedate_to_datetime(message["Date"]) if message["Date"] else None
+        except (TypeError, ValueError):
+            timestamp = None
+        headers = [f"{name}: {_header(message, name)}" for name in ("From", "To") if message.get(name)]
+        yield ImportedMemory(
+            content="\n".join(headers + ["", body]) if headers else body,
+            title=_header(message, "Subject") or None,
+            timestamp=timestamp,
+            source="email"
+        )
+
+def _journal_entry(item: Any) -> Optional[ImportedMemory]:
+    if isinstance(item, str):
+        item = {"content": item}
+    if not isinstance(item, dict):
+        return None
+    content = next((item[key] for key in ("content", "text", "body", "entry") if isinstance(item.get(key), str)), "")
+    if not content.strip():
+        return None
+    date = next((item[key] for key in ("timestamp", "date", "created_at", "created") if item.get(key)), None)
+    return ImportedMemory(
+        content=content.strip(),
+        title=item.get("title") if isinstance(item.get("title"), str) else None,
+        timestamp=parse_date(str(date)) if date else None,
+        source=item.get("source") if isinstance(item.get("source"), str) else "journal"
+    )
+
+def _is_json_lines(handle: TextIO) -> bool:
+    """JSON Lines when the first line is a whole entry on its own, or the second line parses too.
+
+    A minified {"entries": [...]} document is also one object on one line, so
+    a lone object that isn't itself an entry isn't enough.
+    """
+    lines = [line for line in islice(handle, 2)]
+    handle.seek(0)
+    try:
+        first = json.loads(lines[0]) if lines else None
+    except ValueError:
+        return False
+    if not isinstance(first, dict):
+        return False
+    if _journal_entry(first) is not None:
+        return True
+    if len(lines) < 2 or not lines[1].strip():
+        return False
+    try:
+        return isinstance(json.loads(lines[1]), dict)
+    except ValueError:
+        return False
+
+def parse_json_journal(handle: TextIO) -> Iterator[ImportedMemory]:
+    """Entries from a JSON array (or {"entries": [...]}) or from JSON Lines, one object per line."""
+    if _is_json_lines(handle):
+        # JSON Lines: streamed a line at a time
+        for line in handle:
+            if line.strip():
+                entry = _journal_entry(json.loads(line))
+                if entry is not None:
+                    yield entry
+        return
+
+    data = json.load(handle)
+    if isinstance(data, dict):
+        data = data.get("entries") or data.get("memories") or [data]
+    for item in data:
+        entry = _journal_entry(item)
+        if entry is not None:
+            yield entry
+
+_MARKDOWN_HEADING = re.compile(r"^#{1,3}\s+(.+?)\s*#*\s*$")
+
+def parse_markdown_journal(lines: Iterable[str]) -> Iterator[ImportedMemory]:
+    """One entry per heading; headings that are dates become the entry's timestamp."""
+    title: Optional[str] = None
+    body: List[str] = []
+
+    def flush() -> Optional[ImportedMemory]:
+        content = "\n".join(body).strip()
+        if not content:
+            return None
+        return ImportedMemory(content=content, title=title, timestamp=parse_date(title) if title else None,
+                              source="journal")
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        match = _MARKDOWN_HEADING.match(line)
+        if match:
+            entry = flush()
+            if entry is not None:
+                yield entry
+            title, body = match.group(1), []
+        else:
+            body.append(line)
+    entry = flush()
+    if entry is not None:
+        yield entry
+
+def parse_file(path: str, import_format: str) -> Iterator[ImportedMemory]:
+    """Stream the memories in an export file of the given format."""
+    if import_format == "mbox":
+        yield from parse_mbox(path)
+        return
+    if import_format not in IMPORT_FORMATS:
+        raise ImportFormatError(f"Unsupported import format: {import_format}")
+
+    with open(path, encoding="utf-8-sig", errors="replace") as handle:
+        if import_format == "whatsapp":
+            yield from group_chat_messages(parse_whatsapp_messages(handle))
+        elif import_format == "json":
+            yield from parse_json_journal(handle)
+        else:
+            yield from parse_markdown_journal(handle)
+
+def _store_chunk(db: Session, service, user_id: int, chunk: List[ImportedMemory]) -> List[int]:
+    rows = [{
+        "user_id": user_id,
+        "content": memory.content,
+        "content_type": "text",
+        "source": memory.source,
+        "timestamp": memory.timestamp,
+        "title": memory.title or (memory.content[:50] + "..." if len(memory.content) > 50 else memory.content),
+        "processed": False
+    } for memory in chunk]
+    with unit_of_work(db):
+        ids = db.scalars(insert(Memory).returning(Memory.id, sort_by_parameter_order=True), rows).all()
+
+    # Embeddings for the whole chunk; on failure the memories stay unprocessed
+    try:
+        embedding_ids = service.create_embeddings(user_id, [
+            {"id": memory_id, "content_type": "text", **row} for memory_id, row in zip(ids, rows)
+        ])
+    except Exception as e:
+        print(f"Error embedding imported memories: {e}")
+        return ids
+    with unit_of_work(db):
+        db.execute(update(Memory), [
+            {"id": memory_id, "embedding_id": embedding_id, "processed": True}
+            for memory_id, embedding_id in zip(ids, embedding_ids)
+        ])
+    return ids
+
+def import_memories(db: Session, service, user_id: int, memories: Iterable[ImportedMemory],
+                    chunk_size: Optional[int] = None) -> List[int]:
+    """Store parsed memories in chunks and return their ids.
+
+    Each chunk is one multi-row INSERT, then one batched embedding call and one
+    bulk UPDATE recording the embedding ids. Enrichment is left for later
+    (enrich_memories, or the backfill job) so the import isn't held up by it.
+    Chunks are committed as they go; if a later one fails, ImportInterrupted
+    carries the ids already stored.
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    memories = iter(memories)
+    memory_ids: List[int] = []
+    try:
+        while True:
+            chunk = list(islice(memories, chunk_size))
+            if not chunk:
+                break
+            memory_ids.extend(_store_chunk(db, service, user_id, chunk))
+    except Exception as e:
+        # Earlier chunks are committed; tell the caller which ones
+        if memory_ids:
+            raise ImportInterrupted(memory_ids, e) from e
+        raise
+    return memory_ids
+
+def enrich_memories(db: Session, service, user_id: int, memory_ids: List[int], chunk_size: Optional[int] = None):
+    """Enrich imported memories in batches, one bulk UPDATE per batch."""
+    chunk_size = chunk_size or settings.ENRICHMENT_BACKFILL_BATCH_SIZE
+    people = known_people(db, user_id)
+    for start in range(0, len(memory_ids), chunk_size):
+        rows = db.execute(
+            select(Memory.id, Memory.content).where(Memory.id.in_(memory_ids[start:start + chunk_size]))
+        ).all()
+        results = service.enrich_batch([row.content for row in rows], people)
+        with unit_of_work(db):
+            db.execute(update(Memory), [{"id": row.id, **memory_columns(result)} for row, result in zip(rows, results)])
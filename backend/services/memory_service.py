@@ -1,37 +1,51 @@
 import os
 import uuid
-import chromadb
 import openai
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.orm import Session
+from database import SessionLocal, unit_of_work
 from models.memory import Memory
 from models.user import User
 from config import settings
 import json
-import whisper
-from PIL import Image
-import pytesseract
-from sentence_transformers import SentenceTransformer
+from services.enrichment import (
+    Enrichment, EnrichmentBatch, ENRICHMENT_PROMPT, ENRICHMENT_BATCH_PROMPT, MAX_BATCH_CONTENT_CHARS,
+    enrichment_cache
+)
+from services.local_enrichment import local_enricher, KnownPerson
+from services.model_registry import model_registry
+from services.ocr_engine import ocr_engine
+from services.passages import split_passages
+from services.retrieval_scoring import (
+    age_in_days, emotional_intensity, score_candidates, select_relevant, maximal_marginal_relevance
+)
+from services.transcription_engine import transcription_engine
+
+if TYPE_CHECKING:
+    import chromadb
 
 class MemoryService:
     def __init__(self):
-        # Initialize ChromaDB client
-        self.chroma_client = chromadb.PersistentClient(path=settings.chroma_persist_directory)
-        
         # Initialize OpenAI
         openai.api_key = settings.openai_api_key
         
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Initialize Whisper for audio transcription
-        self.whisper_model = whisper.load_model("base")
-        
         # Ensure upload directory exists
         os.makedirs(settings.upload_directory, exist_ok=True)
 
-    def get_or_create_collection(self, user_id: int, collection_name: str = None) -> chromadb.Collection:
+    @property
+    def embedding_model(self):
+        """Sentence embedding model, loaded on first use."""
+        return model_registry.get("embedding")
+
+    @property
+    def chroma_client(self):
+        """ChromaDB client, opened on first use."""
+        return model_registry.get("vector_store")
+
+    def get_or_create_collection(self, user_id: int, collection_name: str = None) -> "chromadb.Collection":
         """Get or create a ChromaDB collection for a user's memories."""
         if not collection_name:
             collection_name = f"user_{user_id}_memories"
@@ -56,60 +70,98 @@ class MemoryService:
             title=metadata.get("title", content[:50] + "..." if len(content) > 50 else content),
         )
         
+        # Flush for the id; the caller owns the transaction and commits once
         db.add(memory)
-        db.commit()
-        db.refresh(memory)
+        db.flush()
         
         # Generate embedding and store in ChromaDB
-        self._create_embedding(memory, content, user_id)
+        self._create_embedding(memory, content, user_id, db)
         
         # Mark as processed
         memory.processed = True
-        db.commit()
         
         return memory
 
+    def process_text_memories(self, memories: List[Dict[str, Any]], user_id: int, db: Session) -> List[int]:
+        """Store many text memories with one multi-row insert and one batched embedding.
+        
+        Each entry has the content and optionally a title, source and
+        timestamp. The caller owns the transaction and commits once.
+        """
+        if not memories:
+            return []
+        
+        rows = [{
+            "user_id": user_id,
+            "content": memory["content"],
+            "content_type": "text",
+            "source": memory.get("source") or "manual",
+            "timestamp": memory.get("timestamp") or datetime.utcnow(),
+            "title": memory.get("title") or (memory["content"][:50] + "..." if len(memory["content"]) > 50 else memory["content"]),
+            "processed": False
+        } for memory in memories]
+        ids = db.scalars(insert(Memory).returning(Memory.id, sort_by_parameter_order=True), rows).all()
+        
+        # Every memory's passages in one encode call and one collection write
+        embedding_ids = self.create_embeddings(user_id, [{"id": memory_id, **row} for memory_id, row in zip(ids, rows)])
+        db.execute(update(Memory), [
+            {"id": memory_id, "embedding_id": embedding_id, "processed": True}
+            for memory_id, embedding_id in zip(ids, embedding_ids)
+        ])
+        
+        return ids
+
+    def transcribe_audio(self, file_path: str) -> Optional[str]:
+        """Transcribe an audio file using the Whisper transcription engine."""
+        return transcription_engine.transcribe(file_path)
+
+    def extract_image_text(self, file_path: str) -> Optional[str]:
+        """Extract text from an image using the OCR engine."""
+        return ocr_engine.image_to_text(file_path)
+
     def process_voice_memory(self, file_path: str, user_id: int, db: Session, **metadata) -> Memory:
         """Process and store an audio memory."""
         
-        # Transcribe audio using Whisper
-        result = self.whisper_model.transcribe(file_path)
-        transcribed_text = result["text"]
+        # Transcribe audio using Whisper, unless the caller already did
+        if "extracted_text" in metadata:
+            transcribed_text = metadata["extracted_text"] or ""
+        else:
+            transcribed_text = self.transcribe_audio(file_path) or ""
+        content = transcribed_text or f"Audio file: {metadata.get('filename', 'unknown')}"
         
         # Create memory record
         memory = Memory(
             user_id=user_id,
-            content=transcribed_text,
+            content=content,
             content_type="voice",
             file_path=file_path,
+            file_hash=metadata.get("file_hash"),
             original_filename=metadata.get("filename"),
             source=metadata.get("source", "upload"),
             timestamp=metadata.get("timestamp", datetime.utcnow()),
             title=metadata.get("title", f"Voice memo: {transcribed_text[:30]}..."),
         )
         
+        # Flush for the id; the caller owns the transaction and commits once
         db.add(memory)
-        db.commit()
-        db.refresh(memory)
+        db.flush()
         
         # Generate embedding and store in ChromaDB
-        self._create_embedding(memory, transcribed_text, user_id)
+        self._create_embedding(memory, content, user_id, db)
         
         # Mark as processed
         memory.processed = True
-        db.commit()
         
         return memory
 
     def process_image_memory(self, file_path: str, user_id: int, db: Session, **metadata) -> Memory:
         """Process and store an image memory."""
         
-        # Extract text from image using OCR
-        try:
-            image = Image.open(file_path)
-            extracted_text = pytesseract.image_to_string(image)
-        except Exception as e:
-            extracted_text = f"Image content could not be extracted: {str(e)}"
+        # Extract text from image using OCR, unless the caller already did
+        if "extracted_text" in metadata:
+            extracted_text = metadata["extracted_text"] or ""
+        else:
+            extracted_text = self.extract_image_text(file_path) or ""
         
         # Create content combining extracted text and metadata
         content = f"Image: {metadata.get('title', 'Untitled image')}\n"
@@ -124,57 +176,157 @@ class MemoryService:
             content=content,
             content_type="image",
             file_path=file_path,
+            file_hash=metadata.get("file_hash"),
             original_filename=metadata.get("filename"),
             source=metadata.get("source", "upload"),
             timestamp=metadata.get("timestamp", datetime.utcnow()),
             title=metadata.get("title", "Image memory"),
         )
         
+        # Flush for the id; the caller owns the transaction and commits once
         db.add(memory)
-        db.commit()
-        db.refresh(memory)
+        db.flush()
         
         # Generate embedding and store in ChromaDB
-        self._create_embedding(memory, content, user_id)
+        self._create_embedding(memory, content, user_id, db)
         
         # Mark as processed
         memory.processed = True
-        db.commit()
         
         return memory
 
-    def _create_embedding(self, memory: Memory, content: str, user_id: int):
-        """Create and store vector embedding for memory content."""
+    def _create_embedding(self, memory: Memory, content: str, user_id: int, db: Optional[Session] = None):
+        """Embed memory content passage by passage and store the vectors in ChromaDB."""
+        
+        # Reuse the passages of an identical earlier upload, otherwise generate them
+        existing = None
+        if db is not None and memory.file_hash:
+            existing = self._find_existing_embedding(memory, content, user_id, db)
+        if existing is not None:
+            passages, embeddings = existing
+        else:
+            passages = split_passages(content)
+            # Nothing to embed or search for
+            if not passages:
+                return
+            embeddings = [embedding.tolist() for embedding in self.embedding_model.encode(passages)]
         
-        # Generate embedding
-        embedding = self.embedding_model.encode([content])[0].tolist()
+        # One id for the memory; each passage vector is stored under it
+        embedding_id = f"memory_{memory.id}_{uuid.uuid4().hex[:8]}"
+        ids, metadatas = self._passage_records(embedding_id, user_id, {
+            "id": memory.id,
+            "content_type": memory.content_type,
+            "timestamp": memory.timestamp,
+            "source": memory.source,
+            "title": memory.title,
+        }, len(passages))
         
-        # Get user's memory collection
+        # Store in ChromaDB
         collection = self.get_or_create_collection(user_id)
+        collection.add(embeddings=embeddings, documents=passages, metadatas=metadatas, ids=ids)
         
-        # Create unique ID for this memory
-        embedding_id = f"memory_{memory.id}_{uuid.uuid4().hex[:8]}"
+        # Update memory with embedding ID
+        memory.embedding_id = embedding_id
+
+    def _passage_records(self, embedding_id: str, user_id: int, memory: Dict[str, Any], count: int):
+        """Vector ids and metadata for a memory's passages, all linked back to the memory."""
+        ids = [f"{embedding_id}:{index}" for index in range(count)]
+        metadatas = [{
+            "memory_id": memory["id"],
+            "embedding_id": embedding_id,
+            "passage": index,
+            "passages": count,
+            "user_id": user_id,
+            "content_type": memory["content_type"],
+            "timestamp": memory["timestamp"].isoformat() if memory["timestamp"] else None,
+            "source": memory["source"],
+            "title": memory["title"],
+        } for index in range(count)]
+        return ids, metadatas
+
+    def _find_existing_embedding(self, memory: Memory, content: str, user_id: int, db: Session):
+        """Look up the stored passages and vectors of an earlier memory with the same file and content."""
+        
+        previous = db.query(Memory.embedding_id).filter(
+            Memory.user_id == user_id,
+            Memory.file_hash == memory.file_hash,
+            Memory.id != memory.id,
+            Memory.embedding_id.isnot(None),
+            Memory.content == content
+        ).first()
+        if not previous:
+            return None
         
-        # Store in ChromaDB
+        collection = self.get_or_create_collection(user_id)
+        result = collection.get(
+            where={"embedding_id": previous.embedding_id},
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if result["embeddings"] is None or len(result["embeddings"]) == 0:
+            return None
+        
+        # Back in passage order
+        order = sorted(range(len(result["ids"])), key=lambda i: result["metadatas"][i].get("passage", 0))
+        return [result["documents"][i] for i in order], [list(result["embeddings"][i]) for i in order]
+
+    def create_embeddings(self, user_id: int, memories: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Embed many stored memories in one encode call and one collection write.
+        
+        Each entry has the memory's id, content, content_type, timestamp,
+        source and title; returns the embedding ids in the same order, None
+        for memories with no text to embed.
+        """
+        if not memories:
+            return []
+        
+        embedding_ids, ids, documents, metadatas = [], [], [], []
+        for memory in memories:
+            passages = split_passages(memory["content"])
+            if not passages:
+                embedding_ids.append(None)
+                continue
+            embedding_id = f"memory_{memory['id']}_{uuid.uuid4().hex[:8]}"
+            passage_ids, passage_metadatas = self._passage_records(embedding_id, user_id, memory, len(passages))
+            embedding_ids.append(embedding_id)
+            ids.extend(passage_ids)
+            documents.extend(passages)
+            metadatas.extend(passage_metadatas)
+        
+        if not documents:
+            return embedding_ids
+        
+        # Every passage of every memory in one encode call
+        embeddings = self.embedding_model.encode(documents)
+        
+        collection = self.get_or_create_collection(user_id)
         collection.add(
-            embeddings=[embedding],
-            documents=[content],
-            metadatas=[{
-                "memory_id": memory.id,
-                "user_id": user_id,
-                "content_type": memory.content_type,
-                "timestamp": memory.timestamp.isoformat() if memory.timestamp else None,
-                "source": memory.source,
-                "title": memory.title,
-            }],
-            ids=[embedding_id]
+            embeddings=[embedding.tolist() for embedding in embeddings],
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
         )
+        return embedding_ids
+
+    def delete_embeddings(self, user_id: int, embedding_ids: List[str]):
+        """Remove memory vectors from a user's collection in batched calls."""
         
-        # Update memory with embedding ID
-        memory.embedding_id = embedding_id
+        if not embedding_ids:
+            return
+        
+        collection = self.get_or_create_collection(user_id)
+        # Passage vectors, then vectors stored whole before passage chunking
+        collection.delete(where={"embedding_id": {"$in": embedding_ids}})
+        collection.delete(ids=embedding_ids)
 
-    def search_memories(self, query: str, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
-        """Search for relevant memories using semantic similarity."""
+    def search_memories(self, query: str, user_id: int, limit: int = 10, mmr_lambda: Optional[float] = None,
+                        with_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Search for relevant memories using semantic similarity.
+        
+        Passages are matched individually and grouped by memory, scored by
+        their best passage. Each result's content is its best-matching
+        passages, so prompts carry the relevant part rather than the whole memory.
+        With `mmr_lambda`, results are diversified by maximal marginal relevance.
+        """
         
         # Get user's memory collection
         collection = self.get_or_create_collection(user_id)
@@ -182,104 +334,249 @@ class MemoryService:
         # Generate embedding for query
         query_embedding = self.embedding_model.encode([query])[0].tolist()
         
-        # Search for similar memories
+        # Search for similar passages, more than needed since several may
+        # belong to the same memory
+        needs_embeddings = with_embeddings or mmr_lambda is not None
+        include = ["documents", "metadatas", "distances"] + (["embeddings"] if needs_embeddings else [])
         results = collection.query(
             query_embeddings=[query_embedding],
-            n_results=limit,
-            include=["documents", "metadatas", "distances"]
+            n_results=limit * max(1, settings.PASSAGE_SEARCH_OVERSAMPLE),
+            include=include
         )
         
-        # Format results
-        memories = []
+        # Group passages by memory, best match first
+        grouped: Dict[Any, Dict[str, Any]] = {}
         if results["documents"] and results["documents"][0]:
             for i, doc in enumerate(results["documents"][0]):
                 metadata = results["metadatas"][0][i]
-                distance = results["distances"][0][i]
-                
-                memories.append({
-                    "content": doc,
-                    "metadata": metadata,
-                    "similarity_score": 1 - distance,  # Convert distance to similarity
-                    "memory_id": metadata.get("memory_id")
-                })
+                memory_id = metadata.get("memory_id")
+                if memory_id not in grouped:
+                    grouped[memory_id] = {
+                        "metadata": metadata,
+                        "similarity_score": 1 - results["distances"][0][i],  # Convert distance to similarity
+                        "memory_id": memory_id,
+                        "matches": []
+                    }
+                    # A memory is represented by its best-matching passage
+                    if needs_embeddings:
+                        grouped[memory_id]["embedding"] = np.asarray(results["embeddings"][0][i], dtype=float)
+                grouped[memory_id]["matches"].append((metadata.get("passage", 0), doc))
+        
+        candidates = list(grouped.values())
+        if mmr_lambda is not None and len(candidates) > 1:
+            order = maximal_marginal_relevance(
+                np.array([candidate["similarity_score"] for candidate in candidates]),
+                np.stack([candidate["embedding"] for candidate in candidates]),
+                limit,
+                mmr_lambda
+            )
+            candidates = [candidates[i] for i in order]
+        
+        # Format results, with each memory's best passages back in document order
+        memories = []
+        for memory in candidates[:limit]:
+            passages = [doc for _, doc in sorted(memory.pop("matches")[:settings.PASSAGES_PER_RESULT])]
+            memory["passages"] = passages
+            memory["content"] = " … ".join(passages)
+            if not with_embeddings:
+                memory.pop("embedding", None)
+            memories.append(memory)
         
         return memories
 
-    def get_context_for_conversation(self, query: str, user_id: int, replica_id: Optional[int] = None, limit: int = 5) -> str:
+    def rank_memories(self, query: str, user_id: int, limit: int = 5, record_access: bool = True,
+                      mmr_lambda: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Search, then re-score candidates on similarity, recency, emotion and use.
+        
+        More candidates than needed are fetched and scored together; those
+        that clear the adaptive threshold are returned best first with their
+        "score", diversified by maximal marginal relevance when `mmr_lambda`
+        is given. Returned memories have their access count bumped.
+        """
+        
+        candidates = self.search_memories(
+            query, user_id, limit * max(1, settings.RETRIEVAL_CANDIDATE_MULTIPLIER), with_embeddings=True
+        )
+        if not candidates:
+            return []
+        
+        db = SessionLocal()
+        try:
+            # Scoring signals the vector store doesn't hold, in one query
+            rows = {row.id: row for row in db.execute(
+                select(Memory.id, Memory.timestamp, Memory.created_at, Memory.emotions, Memory.access_count)
+                .where(Memory.id.in_([candidate["memory_id"] for candidate in candidates]), Memory.user_id == user_id)
+            )}
+            candidates = [candidate for candidate in candidates if candidate["memory_id"] in rows]
+            if not candidates:
+                return []
+            
+            now = datetime.now(timezone.utc)
+            features = [rows[candidate["memory_id"]] for candidate in candidates]
+            similarity = np.array([candidate["similarity_score"] for candidate in candidates], dtype=float)
+            scores = score_candidates(
+                similarity,
+                np.array([age_in_days(row.timestamp or row.created_at, now) for row in features]),
+                np.array([emotional_intensity(row.emotions) for row in features]),
+                np.array([row.access_count or 0 for row in features], dtype=float)
+            )
+            if mmr_lambda is None:
+                chosen = select_relevant(scores, similarity, limit)
+            else:
+                # Diversify among everything that clears the threshold
+                eligible = select_relevant(scores, similarity, len(candidates))
+                picks = maximal_marginal_relevance(
+                    scores[eligible],
+                    np.stack([candidates[i]["embedding"] for i in eligible]) if len(eligible) else np.zeros((0, 0)),
+                    limit,
+                    mmr_lambda
+                )
+                chosen = eligible[picks]
+            ranked = []
+            for i in chosen:
+                memory = {key: value for key, value in candidates[i].items() if key != "embedding"}
+                memory["score"] = float(scores[i])
+                ranked.append(memory)
+            
+            # Retrieval counts feed the access-frequency signal
+            if record_access and ranked:
+                with unit_of_work(db):
+                    db.execute(
+                        update(Memory)
+                        .where(Memory.id.in_([memory["memory_id"] for memory in ranked]))
+                        .values(access_count=func.coalesce(Memory.access_count, 0) + 1)
+                    )
+            return ranked
+        finally:
+            db.close()
+
+    def get_context_for_conversation(self, query: str, user_id: int, replica_id: Optional[int] = None, limit: int = 5,
+                                     mmr_lambda: Optional[float] = None) -> str:
         """Get relevant memory context for a conversation."""
         
-        # Search for relevant memories
-        memories = self.search_memories(query, user_id, limit)
+        # Best memories by blended score, rather than a fixed similarity cutoff,
+        # without near-duplicates taking several slots
+        if mmr_lambda is None:
+            mmr_lambda = settings.MMR_LAMBDA_SELF_CHAT
+        memories = self.rank_memories(query, user_id, limit, mmr_lambda=mmr_lambda)
         
-        # Format context
+        # Format context from each memory's matching passages
         context_parts = []
         for memory in memories:
-            if memory["similarity_score"] > 0.7:  # Only include highly relevant memories
-                timestamp = memory["metadata"].get("timestamp", "Unknown time")
-                content = memory["content"]
-                source = memory["metadata"].get("source", "Unknown source")
-                
-                context_parts.append(f"[{timestamp}] ({source}): {content}")
+            timestamp = memory["metadata"].get("timestamp", "Unknown time")
+            content = memory["content"]
+            source = memory["metadata"].get("source", "Unknown source")
+            
+            context_parts.append(f"[{timestamp}] ({source}): {content}")
         
         if context_parts:
             return "Relevant memories:\n" + "\n\n".join(context_parts)
         else:
             return "No directly relevant memories found."
 
-    def analyze_emotions(self, content: str) -> Dict[str, float]:
-        """Analyze emotions in memory content using OpenAI."""
+    def enrich(self, content: str, known_people: List[KnownPerson] = ()) -> Dict[str, Any]:
+        """Score emotions and extract people, locations and topics.
+        
+        Offline by default; with ENRICHMENT_BACKEND=openai this is one OpenAI
+        call, falling back to the local engine if it fails.
+        """
+        if settings.ENRICHMENT_BACKEND != "openai" or not settings.openai_api_key:
+            return local_enricher.enrich(content, known_people)
+        
+        # Identical content is enriched once
+        cached = enrichment_cache.get(content)
+        if cached is not None:
+            return cached
         
         try:
             response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=settings.ENRICHMENT_MODEL,
+                response_format={"type": "json_object"},
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are an emotion analysis expert. Analyze the emotional content of the given text and return a JSON object with emotion scores between 0 and 1 for: joy, sadness, anger, fear, surprise, disgust, trust, anticipation."
+                        "content": ENRICHMENT_PROMPT
                     },
                     {
                         "role": "user",
                         "content": content
                     }
                 ],
-                max_tokens=200,
+                max_tokens=400,
                 temperature=0.1
             )
             
-            # Parse the response
-            emotion_text = response.choices[0].message.content
-            return json.loads(emotion_text)
-            
+            # Parse and validate the response against the schema
+            result = Enrichment.model_validate_json(response.choices[0].message.content).model_dump()
         except Exception as e:
-            print(f"Error analyzing emotions: {e}")
-            return {}
-
-    def extract_entities(self, content: str) -> Dict[str, List[str]]:
-        """Extract people, locations, and topics from memory content."""
+            # Not cached, so a later call can try again
+            print(f"Error enriching memory: {e}")
+            return local_enricher.enrich(content, known_people)
         
+        enrichment_cache.put(content, result)
+        return result
+
+    def enrich_batch(self, contents: List[str], known_people: List[KnownPerson] = ()) -> List[Dict[str, Any]]:
+        """Enrich several memories at once, in order.
+        
+        Locally this is one vectorized pass; with ENRICHMENT_BACKEND=openai the
+        memories not already cached share OpenAI requests of up to
+        ENRICHMENT_LLM_BATCH_SIZE memories each.
+        """
+        if settings.ENRICHMENT_BACKEND != "openai" or not settings.openai_api_key:
+            return local_enricher.enrich_batch(contents, known_people)
+        
+        results: List[Optional[Dict[str, Any]]] = [enrichment_cache.get(content) for content in contents]
+        pending = [i for i, result in enumerate(results) if result is None]
+        size = max(1, settings.ENRICHMENT_LLM_BATCH_SIZE)
+        for start in range(0, len(pending), size):
+            group = pending[start:start + size]
+            for i, result in zip(group, self._request_enrichments([contents[i] for i in group], known_people)):
+                results[i] = result
+        return results
+
+    def _request_enrichments(self, contents: List[str], known_people: List[KnownPerson]) -> List[Dict[str, Any]]:
+        """One OpenAI request for a group of memories, falling back to local for the group."""
+        numbered = "\n\n".join(
+            f"[{i + 1}] {content[:MAX_BATCH_CONTENT_CHARS]}" for i, content in enumerate(contents)
+        )
         try:
             response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=settings.ENRICHMENT_MODEL,
+                response_format={"type": "json_object"},
                 messages=[
                     {
                         "role": "system",
-                        "content": "Extract people, locations, and topics from the text. Return a JSON object with three arrays: 'people' (names of people mentioned), 'locations' (places mentioned), and 'topics' (main themes or subjects discussed)."
+                        "content": ENRICHMENT_BATCH_PROMPT
                     },
                     {
                         "role": "user",
-                        "content": content
+                        "content": numbered
                     }
                 ],
-                max_tokens=300,
+                max_tokens=300 * len(contents),
                 temperature=0.1
             )
             
-            # Parse the response
-            entities_text = response.choices[0].message.content
-            return json.loads(entities_text)
-            
+            batch = EnrichmentBatch.model_validate_json(response.choices[0].message.content)
+            if len(batch.results) != len(contents):
+                raise ValueError(f"expected {len(contents)} results, got {len(batch.results)}")
         except Exception as e:
-            print(f"Error extracting entities: {e}")
-            return {"people": [], "locations": [], "topics": []}
+            print(f"Error enriching memory batch: {e}")
+            return local_enricher.enrich_batch(contents, known_people)
+        
+        results = [result.model_dump() for result in batch.results]
+        for content, result in zip(contents, results):
+            enrichment_cache.put(content, result)
+        return results
+
+    def analyze_emotions(self, content: str) -> Dict[str, float]:
+        """Analyze emotions in memory content."""
+        return self.enrich(content)["emotions"]
+
+    def extract_entities(self, content: str) -> Dict[str, List[str]]:
+        """Extract people, locations, and topics from memory content."""
+        enrichment = self.enrich(content)
+        return {key: enrichment[key] for key in ("people", "locations", "topics")}
 
 memory_service = MemoryService() 
\ No newline at end of file
@@ -2,11 +2,13 @@ import os
 import uuid
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from models.memory import Memory
 from models.user import User
 from config import settings
 import json
+from services.local_enrichment import local_enricher, KnownPerson
 
 class MemoryService:
     def __init__(self):
@@ -27,12 +29,42 @@ class MemoryService:
             processed=True
         )
         
+        # Flush for the id; the caller owns the transaction and commits once
         db.add(memory)
-        db.commit()
-        db.refresh(memory)
+        db.flush()
         
         return memory
 
+    def process_text_memories(self, memories: List[Dict[str, Any]], user_id: int, db: Session) -> List[int]:
+        """Store many text memories with one multi-row insert (no embeddings).
+        
+        Each entry has the content and optionally a title, source and
+        timestamp. The caller owns the transaction and commits once.
+        """
+        if not memories:
+            return []
+        
+        rows = [{
+            "user_id": user_id,
+            "content": memory["content"],
+            "content_type": "text",
+            "source": memory.get("source") or "manual",
+            "timestamp": memory.get("timestamp") or datetime.utcnow(),
+            "title": memory.get("title") or (memory["content"][:50] + "..." if len(memory["content"]) > 50 else memory["content"]),
+            "processed": True
+        } for memory in memories]
+        ids = db.scalars(insert(Memory).returning(Memory.id, sort_by_parameter_order=True), rows).all()
+        
+        return ids
+
+    def transcribe_audio(self, file_path: str) -> Optional[str]:
+        """Transcribe an audio file (simplified - no transcription)."""
+        return None
+
+    def extract_image_text(self, file_path: str) -> Optional[str]:
+        """Extract text from an image (simplified - no OCR)."""
+        return None
+
     def process_voice_memory(self, file_path: str, user_id: int, db: Session, **metadata) -> Memory:
         """Process and store an audio memory (simplified - no transcription)."""
         
@@ -42,6 +74,7 @@ class MemoryService:
             content=f"Audio file: {metadata.get('filename', 'unknown')}",
             content_type="voice",
             file_path=file_path,
+            file_hash=metadata.get("file_hash"),
             original_filename=metadata.get("filename"),
             source=metadata.get("source", "upload"),
             timestamp=metadata.get("timestamp", datetime.utcnow()),
@@ -49,9 +82,9 @@ class MemoryService:
             processed=True
         )
         
+        # Flush for the id; the caller owns the transaction and commits once
         db.add(memory)
-        db.commit()
-        db.refresh(memory)
+        db.flush()
         
         return memory
 
@@ -69,6 +102,7 @@ class MemoryService:
             content=content,
             content_type="image",
             file_path=file_path,
+            file_hash=metadata.get("file_hash"),
             original_filename=metadata.get("filename"),
             source=metadata.get("source", "upload"),
             timestamp=metadata.get("timestamp", datetime.utcnow()),
@@ -76,28 +110,52 @@ class MemoryService:
             processed=True
         )
         
+        # Flush for the id; the caller owns the transaction and commits once
         db.add(memory)
-        db.commit()
-        db.refresh(memory)
+        db.flush()
         
         return memory
 
-    def search_memories(self, query: str, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    def create_embeddings(self, user_id: int, memories: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Embed many memories (simplified - no vector store)."""
+        return [None] * len(memories)
+
+    def delete_embeddings(self, user_id: int, embedding_ids: List[str]):
+        """Remove memory vectors (simplified - no vector store)."""
+        return None
+
+    def search_memories(self, query: str, user_id: int, limit: int = 10, mmr_lambda: Optional[float] = None,
+                        with_embeddings: bool = False) -> List[Dict[str, Any]]:
         """Search for memories using simple text matching."""
         # This is a simplified version - in production, use semantic search
         return []
 
-    def get_context_for_conversation(self, query: str, user_id: int, replica_id: Optional[int] = None, limit: int = 5) -> str:
+    def rank_memories(self, query: str, user_id: int, limit: int = 5, record_access: bool = True,
+                      mmr_lambda: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Search and re-score memories (simplified - no vector store)."""
+        return []
+
+    def get_context_for_conversation(self, query: str, user_id: int, replica_id: Optional[int] = None, limit: int = 5,
+                                     mmr_lambda: Optional[float] = None) -> str:
         """Get relevant memory context for conversation (simplified)."""
         return "No memories found for context."
 
+    def enrich(self, content: str, known_people: List[KnownPerson] = ()) -> Dict[str, Any]:
+        """Analyze emotions and extract entities together, offline."""
+        return local_enricher.enrich(content, known_people)
+
+    def enrich_batch(self, contents: List[str], known_people: List[KnownPerson] = ()) -> List[Dict[str, Any]]:
+        """Enrich several memories in one offline pass."""
+        return local_enricher.enrich_batch(contents, known_people)
+
     def analyze_emotions(self, content: str) -> Dict[str, float]:
-        """Analyze emotions in content (simplified)."""
-        return {"positive": 0.5, "negative": 0.3, "neutral": 0.2}
+        """Analyze emotions in content (offline lexicon)."""
+        return self.enrich(content)["emotions"]
 
     def extract_entities(self, content: str) -> Dict[str, List[str]]:
-        """Extract entities from content (simplified)."""
-        return {"people": [], "places": [], "organizations": [], "dates": []}
+        """Extract people, locations, and topics from content (offline rules)."""
+        enrichment = self.enrich(content)
+        return {key: enrichment[key] for key in ("people", "locations", "topics")}
 
 # Global instance
 memory_service = MemoryService() 
\ No newline at end of file
@@ -0,0 +1,104 @@
+import json
+import socket
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+from config import settings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Every message is: header length, payload length (both uint32), JSON header, raw payload
+_FRAME_PREFIX = struct.Struct("!II")
+FRAME_PREFIX_SIZE = _FRAME_PREFIX.size
+
+class ModelServerError(Exception):
+    """Raised when the model server can't be reached or reports a failure."""
+    pass
+
+def pack_message(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    return _FRAME_PREFIX.pack(len(encoded), len(payload)) + encoded + payload
+
+def unpack_prefix(prefix: bytes) -> Tuple[int, int]:
+    return _FRAME_PREFIX.unpack(prefix)
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ModelServerError("Model server closed the connection")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+class ModelClient:
+    """Blocking client for the local model server (see model_server.py).
+
+    Each thread keeps its own connection to the Unix socket, so concurrent
+    callers' requests reach the server together and get batched there.
+    """
+
+    def __init__(self, socket_path: str, timeout_seconds: int):
+        self.socket_path = socket_path
+        self.timeout_seconds = timeout_seconds
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_seconds)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def request(self, header: Dict[str, Any], payload: bytes = b"") -> Tuple[Dict[str, Any], bytes]:
+        """Send one request and wait for its response."""
+        try:
+            sock = self._connection()
+            sock.sendall(pack_message(header, payload))
+            header_size, payload_size = unpack_prefix(_recv_exactly(sock, _FRAME_PREFIX.size))
+            response = json.loads(_recv_exactly(sock, header_size))
+            response_payload = _recv_exactly(sock, payload_size) if payload_size else b""
+        except (OSError, ModelServerError) as e:
+            # The connection may be half-used; start fresh next time
+            self._close()
+            raise ModelServerError(f"Model server request failed: {e}") from e
+
+        if "error" in response:
+            raise ModelServerError(response["error"])
+        return response, response_payload
+
+    def ping(self) -> Dict[str, Any]:
+        return self.request({"op": "ping"})[0]
+
+    def embed(self, texts: List[str]):
+        """Embeddings for `texts` as a float32 array of shape (len(texts), dim)."""
+        response, payload = self.request({"op": "embed", "texts": texts})
+        return np.frombuffer(payload, dtype=np.float32).reshape(response["shape"])
+
+    def transcribe(self, file_path: str) -> Optional[str]:
+        return self.request({"op": "transcribe", "path": file_path})[0].get("text")
+
+class RemoteEmbeddingModel:
+    """Stands in for a SentenceTransformer, encoding through the model server."""
+
+    def __init__(self, client: ModelClient):
+        self.client = client
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs):
+        if isinstance(sentences, str):
+            return self.client.embed([sentences])[0]
+        return self.client.embed(list(sentences))
+
+# Global instance
+model_client = ModelClient(settings.MODEL_SERVER_SOCKET, settings.MODEL_SERVER_TIMEOUT_SECONDS)
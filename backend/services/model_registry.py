@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from config import settings
+
+class ModelUnavailable(Exception):
+    """Raised when a model is disabled in this process or failed to load."""
+    pass
+
+class ModelRegistry:
+    """Heavy ML components, loaded once per process on first use.
+
+    Nothing is imported or loaded until a component is first needed (or
+    warmed up at startup), so the API starts without paying for models it may
+    never use. With LOAD_MODELS off, e.g. on API-only workers, every
+    component reports itself disabled and is never loaded.
+    """
+
+    def __init__(self, enabled: bool, use_model_server: bool):
+        self.enabled = enabled
+        # Embeddings and transcription go to the shared model server rather
+        # than models loaded in this process
+        self.use_model_server = use_model_server
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._loading: set = set()
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Return a loaded component, loading it now if this is its first use."""
+        if name in self._models:
+            return self._models[name]
+        if not self.enabled:
+            raise ModelUnavailable(f"{name} is disabled on this worker (LOAD_MODELS=false)")
+
+        with self._locks[name]:
+            if name not in self._models:
+                self._loading.add(name)
+                started = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                    self._errors.pop(name, None)
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise ModelUnavailable(f"{name} failed to load: {e}") from e
+                finally:
+                    self._loading.discard(name)
+                    self._load_seconds[name] = round(time.perf_counter() - started, 2)
+        return self._models[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    async def warm_up(self, names: Optional[List[str]] = None):
+        """Load components in the background so the first request doesn't wait for them."""
+        from services.executors import run_model
+
+        async def load(name: str):
+            try:
+                await run_model(self.get, name)
+            except ModelUnavailable as e:
+                print(f"Model warm-up: {e}")
+
+        await asyncio.gather(*(load(name) for name in (names or list(self._loaders))))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Readiness of every component, for /health."""
+        status = {}
+        for name in self._loaders:
+            if not self.enabled:
+                state = "disabled"
+            elif name in self._models:
+                state = "ready"
+            elif name in self._loading:
+                state = "loading"
+            elif name in self._errors:
+                state = "failed"
+            else:
+                state = "not_loaded"
+            entry = {"state": state}
+            if name in self._load_seconds:
+                entry["load_seconds"] = self._load_seconds[name]
+            if state == "failed":
+                entry["error"] = self._errors[name]
+            status[name] = entry
+        return status
+
+    def ready(self) -> bool:
+        return all(entry["state"] in ("ready", "disabled") for entry in self.status().values())
+
+def _load_embedding_model():
+    if model_registry.use_model_server:
+        from services.model_client import model_client, RemoteEmbeddingModel
+        model_client.ping()
+        return RemoteEmbeddingModel(model_client)
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(settings.EMBEDDING_MODEL)
+
+def _load_chroma_client():
+    import chromadb
+    return chromadb.PersistentClient(path=settings.chroma_persist_directory)
+
+def _load_whisper():
+    if model_registry.use_model_server:
+        from services.model_client import model_client
+        model_client.ping()
+        return f"served by {settings.MODEL_SERVER_SOCKET}"
+
+    # The model itself lives in the transcription worker processes
+    from services.transcription_engine import transcription_engine
+    return transcription_engine.warm_up()
+
+def _load_ocr():
+    # Tesseract is a separate binary; check it's installed and callable
+    import pytesseract
+    return str(pytesseract.get_tesseract_version())
+
+# Global instance
+model_registry = ModelRegistry(
+    enabled=settings.LOAD_MODELS,
+    use_model_server=bool(settings.MODEL_SERVER_SOCKET)
+)
+model_registry.register("embedding", _load_embedding_model)
+model_registry.register("vector_store", _load_chroma_client)
+model_registry.register("whisper", _load_whisper)
+model_registry.register("ocr", _load_ocr)
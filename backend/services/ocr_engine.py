@@ -0,0 +1,122 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Optional, Tuple
+from services.executors import ExecutorPool
+from services.model_registry import model_registry
+from config import settings
+
+try:
+    import pytesseract
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # OCR is optional; image memories are stored without text
+    pytesseract = None
+
+# Size of the copy used to decide whether an image is worth OCR-ing
+_SKIP_CHECK_EDGE = 512
+
+# Edge strength (0-255) counted as a sharp edge such as a glyph outline
+_STRONG_EDGE = 64
+
+def _otsu_threshold(histogram: List[int]) -> Tuple[int, float]:
+    """Otsu's threshold for a 256-bin histogram and how well it separates the two classes.
+
+    The separation (between-class over total variance, 0..1) is high for text
+    on a plain background and low for continuous-tone photos.
+    """
+    total = sum(histogram)
+    if not total:
+        return 127, 0.0
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    mean = sum_all / total
+    variance = sum(count * (level - mean) ** 2 for level, count in enumerate(histogram)) / total
+
+    best_threshold, best_between = 127, 0.0
+    weight_dark, sum_dark = 0, 0
+    for level, count in enumerate(histogram):
+        weight_dark += count
+        weight_light = total - weight_dark
+        if weight_dark == 0:
+            continue
+        if weight_light == 0:
+            break
+        sum_dark += level * count
+        mean_dark = sum_dark / weight_dark
+        mean_light = (sum_all - sum_dark) / weight_light
+        between = weight_dark * weight_light * (mean_dark - mean_light) ** 2 / total ** 2
+        if between > best_between:
+            best_threshold, best_between = level, between
+
+    return best_threshold, (best_between / variance if variance else 0.0)
+
+def _edge_density(gray) -> float:
+    """Fraction of pixels on a sharp edge, measured on a small copy."""
+    small = gray.copy()
+    small.thumbnail((_SKIP_CHECK_EDGE, _SKIP_CHECK_EDGE))
+    histogram = small.filter(ImageFilter.FIND_EDGES).histogram()
+    return sum(histogram[_STRONG_EDGE:]) / (small.width * small.height)
+
+def ocr_image(file_path: str) -> str:
+    """OCR one image; runs in an OCR worker process.
+
+    The image is downscaled, converted to grayscale and binarized before it
+    reaches Tesseract. Images that look text-free return "" without running
+    Tesseract at all.
+    """
+    with Image.open(file_path) as source:
+        # Let JPEG decode straight to a reduced scale instead of full resolution
+        source.draft("L", (settings.OCR_MAX_EDGE, settings.OCR_MAX_EDGE))
+        gray = ImageOps.exif_transpose(source).convert("L")
+    gray.thumbnail((settings.OCR_MAX_EDGE, settings.OCR_MAX_EDGE))
+    gray = ImageOps.autocontrast(gray)
+
+    histogram = gray.histogram()
+    threshold, separation = _otsu_threshold(histogram)
+    if settings.OCR_SKIP_TEXTLESS and (
+        separation < settings.OCR_MIN_CONTRAST_SEPARATION
+        or _edge_density(gray) < settings.OCR_MIN_EDGE_DENSITY
+    ):
+        return ""
+
+    # Tesseract reads dark text on a light background best
+    light_pixels = sum(histogram[threshold + 1:])
+    dark_text = light_pixels * 2 >= sum(histogram)
+    binary = gray.point([255 if (level > threshold) == dark_text else 0 for level in range(256)], "1")
+
+    return pytesseract.image_to_string(
+        binary,
+        lang=settings.OCR_LANGUAGE,
+        timeout=settings.OCR_TIMEOUT_SECONDS
+    )
+
+class OCREngine:
+    """Extracts text from images on a dedicated process pool, one image per core."""
+
+    def __init__(self, workers: int, timeout_seconds: int):
+        self.timeout_seconds = timeout_seconds
+        self.pool = ExecutorPool("ocr", workers, kind="process")
+
+    @property
+    def available(self) -> bool:
+        return model_registry.enabled and pytesseract is not None
+
+    def image_to_text(self, file_path: str) -> Optional[str]:
+        """Text found in an image, "" if it has none, or None if OCR failed or timed out."""
+        if not self.available:
+            return None
+        try:
+            # Checks the Tesseract binary once per process
+            model_registry.get("ocr")
+            
+            # Tesseract is killed at the timeout; the extra margin covers
+            # loading and pre-processing the image
+            return self.pool.call(ocr_image, file_path, timeout=self.timeout_seconds + 10)
+        except FutureTimeoutError:
+            print(f"OCR timed out for {file_path}")
+        except Exception as e:
+            print(f"Error running OCR on {file_path}: {e}")
+        return None
+
+# Global instance
+ocr_engine = OCREngine(
+    workers=settings.OCR_POOL_WORKERS,
+    timeout_seconds=settings.OCR_TIMEOUT_SECONDS
+)
@@ -0,0 +1,55 @@
+import re
+from typing import List, Optional
+from config import settings
+
+# Sentence ends, and blank lines between paragraphs
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])[\"')\]]*\s+|\n\s*\n")
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_BREAK.split(text) if sentence and sentence.strip()]
+
+def split_passages(text: str, max_words: Optional[int] = None, overlap_words: Optional[int] = None) -> List[str]:
+    """Split text into passages of whole sentences that fit the embedding model.
+
+    Each passage holds up to `max_words` words; the next one starts with the
+    last sentences of the previous one (up to `overlap_words` words) so a
+    thought that spans a boundary is still whole in one of them. Sentences
+    longer than a passage are cut into word windows. Text with no words gives
+    no passages.
+    """
+    max_words = max_words or settings.PASSAGE_MAX_WORDS
+    overlap_words = settings.PASSAGE_OVERLAP_WORDS if overlap_words is None else overlap_words
+    overlap_words = min(overlap_words, max_words // 2)
+
+    # Sentences as word lists, with over-long ones cut down to size
+    sentences: List[List[str]] = []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        step = max_words - overlap_words
+        if len(words) <= max_words:
+            sentences.append(words)
+        else:
+            sentences.extend(words[start:start + max_words] for start in range(0, len(words) - overlap_words, step))
+    if not sentences:
+        return []
+
+    passages: List[str] = []
+    current: List[List[str]] = []
+    length = 0
+    for words in sentences:
+        if current and length + len(words) > max_words:
+            passages.append(" ".join(word for sentence in current for word in sentence))
+
+            # Carry trailing sentences over as overlap, if they leave room
+            carried: List[List[str]] = []
+            carried_length = 0
+            for sentence in reversed(current):
+                if carried_length + len(sentence) > overlap_words or carried_length + len(sentence) + len(words) > max_words:
+                    break
+                carried.insert(0, sentence)
+                carried_length += len(sentence)
+            current, length = carried, carried_length
+        current.append(words)
+        length += len(words)
+    passages.append(" ".join(word for sentence in current for word in sentence))
+    return passages
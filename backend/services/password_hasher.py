@@ -0,0 +1,32 @@
+from typing import Any, Dict
+from passlib.context import CryptContext
+from services.executors import ExecutorPool
+from config import settings
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+    bcrypt costs 100-300ms of CPU per call; running it here keeps the event loop
+    free, caps how many cores logins can take, and sheds load (PoolBusy) once
+    the queue is full.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pool = ExecutorPool("bcrypt", max_workers, max_queue=max_queue)
+
+    async def hash(self, password: str) -> str:
+        return await self.pool.run(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.pool.run(self.pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation metrics."""
+        return self.pool.stats()
+
+# Global instance
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+class RateLimiter:
+    """In-process sliding-window rate limiter keyed by any string (client IP, username)."""
+
+    def __init__(self, max_attempts: int, window_seconds: int, max_keys: int = 100000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> Optional[float]:
+        """Record an attempt for `key`.
+
+        Returns None if the attempt is allowed, otherwise the number of seconds
+        until the oldest attempt leaves the window.
+        """
+        if self.max_attempts <= 0:
+            return None
+        
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = deque()
+                self._hits[key] = hits
+            self._hits.move_to_end(key)
+            
+            # Forget attempts that have left the window
+            while hits and hits[0] <= now - self.window_seconds:
+                hits.popleft()
+            
+            if len(hits) >= self.max_attempts:
+                return hits[0] + self.window_seconds - now
+            
+            hits.append(now)
+            
+            # Bound memory under floods of distinct keys
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+            
+            return None
+
+    def reset(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+import numpy as np
+from config import settings
+
+def emotional_intensity(emotions: Any) -> float:
+    """Strongest emotion score of a memory, 0 when it hasn't been enriched."""
+    if not isinstance(emotions, dict):
+        return 0.0
+    scores = [value for value in emotions.values() if isinstance(value, (int, float))]
+    return min(1.0, max(scores, default=0.0))
+
+def age_in_days(when: Optional[datetime], now: datetime) -> float:
+    if when is None:
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - when).total_seconds() / 86400)
+
+def score_candidates(similarity: np.ndarray, age_days: np.ndarray, intensity: np.ndarray,
+                     access_count: np.ndarray) -> np.ndarray:
+    """Blend relevance signals into one score per candidate, all in 0..1 before weighting.
+
+    Recency halves every RETRIEVAL_RECENCY_HALF_LIFE_DAYS; access frequency is
+    log-scaled against the most retrieved candidate so one popular memory
+    doesn't swamp the rest.
+    """
+    recency = np.exp(-np.log(2) * age_days / max(settings.RETRIEVAL_RECENCY_HALF_LIFE_DAYS, 1e-6))
+    access = np.log1p(access_count) / np.log1p(max(float(access_count.max(initial=0)), 1.0))
+    return (
+        settings.RETRIEVAL_WEIGHT_SIMILARITY * np.clip(similarity, 0.0, 1.0)
+        + settings.RETRIEVAL_WEIGHT_RECENCY * recency
+        + settings.RETRIEVAL_WEIGHT_EMOTION * np.clip(intensity, 0.0, 1.0)
+        + settings.RETRIEVAL_WEIGHT_ACCESS * access
+    )
+
+def select_relevant(scores: np.ndarray, similarity: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the best candidates, best first, under an adaptive threshold.
+
+    Candidates must clear a similarity floor, then score within
+    RETRIEVAL_RELATIVE_THRESHOLD of the best one; rather than a fixed cutoff
+    that can leave nothing, the best relevant candidate is always kept.
+    """
+    eligible = np.flatnonzero(similarity >= settings.RETRIEVAL_MIN_SIMILARITY)
+    if eligible.size == 0:
+        return eligible
+    ordered = eligible[np.argsort(-scores[eligible], kind="stable")]
+    threshold = scores[ordered[0]] * settings.RETRIEVAL_RELATIVE_THRESHOLD
+    return ordered[scores[ordered] >= threshold][:limit]
+
+def maximal_marginal_relevance(relevance: np.ndarray, embeddings: np.ndarray, limit: int,
+                               mmr_lambda: float) -> np.ndarray:
+    """Pick `limit` candidates balancing relevance against similarity to those already picked.
+
+    Each step takes the candidate maximising
+    mmr_lambda * relevance - (1 - mmr_lambda) * (max cosine similarity to the picks so far),
+    so near-duplicates (the same event from a journal and a chat export) give
+    way to distinct memories. 1 is plain relevance order; lower values diversify more.
+    """
+    count = len(relevance)
+    if count == 0 or limit <= 0:
+        return np.array([], dtype=int)
+
+    vectors = np.asarray(embeddings, dtype=float)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    # Similarity of every candidate to its closest pick so far
+    redundancy = similarity[:, selected[0]].copy()
+    available = np.ones(count, dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < min(limit, count):
+        marginal = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        marginal[~available] = -np.inf
+        choice = int(np.argmax(marginal))
+        selected.append(choice)
+        available[choice] = False
+        redundancy = np.maximum(redundancy, similarity[:, choice])
+    return np.array(selected, dtype=int)
@@ -0,0 +1,150 @@
+import importlib.util
+import os
+from typing import List, Optional, Tuple
+from services.executors import ExecutorPool
+from services.model_registry import model_registry, ModelUnavailable
+from config import settings
+
+try:
+    import numpy as np
+except ImportError:  # transcription is optional; voice memories are stored without text
+    np = None
+
+# Whisper works on 16kHz mono audio
+SAMPLE_RATE = 16000
+
+# Frame length used to measure loudness when looking for silence
+_FRAME_SECONDS = 0.03
+
+# Model loaded once per worker process, on its first chunk
+_model = None
+
+def _load_model():
+    """Load the configured Whisper model into this worker process."""
+    global _model
+    if _model is None:
+        import torch
+        import whisper
+
+        # Share the cores between workers instead of every worker using all of them
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // settings.WHISPER_WORKERS))
+
+        model = whisper.load_model(settings.WHISPER_MODEL, device=settings.WHISPER_DEVICE)
+        if settings.WHISPER_COMPUTE_TYPE == "int8" and settings.WHISPER_DEVICE == "cpu":
+            # Whisper's Linear subclass only adds dtype casting for fp16, so
+            # plain Linear layers behave the same on CPU and can be quantized
+            for module in model.modules():
+                if isinstance(module, whisper.model.Linear):
+                    module.__class__ = torch.nn.Linear
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        _model = model
+    return _model
+
+def transcribe_chunk(audio) -> str:
+    """Transcribe one chunk of 16kHz audio; runs in a transcription worker process."""
+    result = _load_model().transcribe(
+        audio,
+        fp16=settings.WHISPER_COMPUTE_TYPE == "float16",
+        language=settings.WHISPER_LANGUAGE or None
+    )
+    return result["text"].strip()
+
+def warm_worker() -> int:
+    """Load the model in a worker ahead of its first chunk."""
+    _load_model()
+    return os.getpid()
+
+def split_on_silence(audio, chunk_seconds: float, min_silence_seconds: float,
+                     silence_db: float) -> List[Tuple[int, int]]:
+    """Split audio into (start, end) sample ranges of at most chunk_seconds.
+
+    Each cut is placed in the middle of the latest pause in the second half of
+    the chunk, so words aren't cut in two; with no pause there the chunk is
+    cut at its full length.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    if total <= chunk:
+        return [(0, total)]
+
+    # Loudness per frame in dB relative to the loudest frame
+    frame = int(_FRAME_SECONDS * SAMPLE_RATE)
+    frames = total // frame
+    rms = np.sqrt(np.mean(np.square(audio[:frames * frame].reshape(frames, frame)), axis=1)) + 1e-10
+    silent = 20 * np.log10(rms / rms.max()) < silence_db
+
+    # Midpoints of silent runs long enough to count as a pause
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    long_enough = (run_ends - run_starts) * _FRAME_SECONDS >= min_silence_seconds
+    pauses = ((run_starts[long_enough] + run_ends[long_enough]) // 2) * frame
+
+    bounds = []
+    start = 0
+    while total - start > chunk:
+        candidates = pauses[(pauses > start + chunk // 2) & (pauses <= start + chunk)]
+        cut = int(candidates[-1]) if len(candidates) else start + chunk
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, total))
+    return bounds
+
+class TranscriptionEngine:
+    """Transcribes audio with Whisper on a pool of worker processes.
+
+    Long recordings are split on silence and the chunks transcribed in
+    parallel, one per worker, then joined back in order.
+    """
+
+    def __init__(self, workers: int):
+        self.pool = ExecutorPool("transcribe", workers, kind="process")
+
+    @property
+    def available(self) -> bool:
+        if not model_registry.enabled:
+            return False
+        return model_registry.use_model_server or (np is not None and importlib.util.find_spec("whisper") is not None)
+
+    def warm_up(self) -> str:
+        """Start every worker and load the model in each; called through the model registry."""
+        futures = [self.pool.submit(warm_worker) for _ in range(self.pool.max_workers)]
+        pids = {future.result() for future in futures}
+        return f"{settings.WHISPER_MODEL} ({settings.WHISPER_COMPUTE_TYPE}) in {len(pids)} workers"
+
+    def transcribe(self, file_path: str) -> Optional[str]:
+        """Transcript of an audio file, or None if it couldn't be transcribed."""
+        if not self.available:
+            return None
+        try:
+            model_registry.get("whisper")
+            if model_registry.use_model_server:
+                from services.model_client import model_client
+                return model_client.transcribe(file_path)
+            
+            import whisper
+            audio = whisper.load_audio(file_path, sr=SAMPLE_RATE)
+            bounds = split_on_silence(
+                audio,
+                settings.WHISPER_CHUNK_SECONDS,
+                settings.WHISPER_MIN_SILENCE_SECONDS,
+                settings.WHISPER_SILENCE_DB
+            )
+            
+            # Whisper tends to invent words for silence, so silent chunks are skipped
+            floor = np.abs(audio).max() * 10 ** (settings.WHISPER_SILENCE_DB / 20) if len(audio) else 0
+            futures = [
+                self.pool.submit(transcribe_chunk, audio[start:end])
+                for start, end in bounds
+                if end > start and np.abs(audio[start:end]).max() > floor
+            ]
+            texts = [future.result() for future in futures]
+            return " ".join(text for text in texts if text)
+        except ModelUnavailable as e:
+            print(f"Transcription unavailable: {e}")
+            return None
+        except Exception as e:
+            print(f"Error transcribing {file_path}: {e}")
+            return None
+
+# Global instance
+transcription_engine = TranscriptionEngine(workers=settings.WHISPER_WORKERS)
@@ -126,7 +126,7 @@ class ApiService {
     });
   }
 
-  async getMemories(params?: { skip?: number; limit?: number; content_type?: string; source?: string }) {
+  async getMemories(params?: { cursor?: string; limit?: number; content_type?: string; source?: string }) {
     return this.get('/memories/', { params });
   }
 
@@ -134,6 +134,10 @@ class ApiService {
     return this.post('/memories/search', { query, limit });
   }
 
+  async deleteMemories(memoryIds: number[]) {
+    return this.delete('/memories/', { data: { memory_ids: memoryIds } });
+  }
+
   async deleteMemory(id: number) {
     return this.delete(`/memories/${id}`);
   }